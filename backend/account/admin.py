@@ -76,8 +76,16 @@ class CustomerUserAdmin(admin.ModelAdmin):
         (_('Note'), {'fields': ('note',)}),
     )
 
-    list_display = ('user', 'first_name', 'last_name', 'phone')
+    list_display = ('user', 'display_name', 'first_name', 'last_name', 'phone')
+    list_select_related = ('user',)
     search_fields = ('user__email__icontains', 'first_name', 'last_name', 'phone')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_display_name()
+
+    @admin.display(description=_('Name'), ordering='display_name')
+    def display_name(self, obj):
+        return obj.get_full_name()
+
 admin.site.register(Manager)
 admin.site.register(Employee)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import csv
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from account.models import CustomerUser
+
+PROGRESS_EVERY = 100000
+
+
+class Command(BaseCommand):
+    help = 'Write the id, email and display name of every customer as CSV, streamed with constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='CSV file to write, "-" for stdout')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows fetched from the database at a time')
+
+    def write_rows(self, out, chunk_size):
+        # Names are computed by the database and rows streamed from a cursor, no model instances are built
+        rows = (
+            CustomerUser.objects.with_display_name()
+            .order_by('pk')
+            .values_list('pk', 'user__email', 'display_name')
+            .iterator(chunk_size=chunk_size)
+        )
+        writer = csv.writer(out)
+        writer.writerow(('id', 'email', 'name'))
+        count = 0
+        started = time.perf_counter()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                self.stderr.write(f'{count} customers ({time.perf_counter() - started:.2f}s)')
+        return count
+
+    def handle(self, *args, **options):
+        output = options['output']
+        started = time.perf_counter()
+        if output == '-':
+            count = self.write_rows(sys.stdout, options['chunk_size'])
+        else:
+            # Write next to the target and rename, readers never see a partial file
+            partial = f'{output}.partial'
+            with open(partial, 'w', newline='', encoding='utf-8') as out:
+                count = self.write_rows(out, options['chunk_size'])
+            os.replace(partial, output)
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {count} customers in {time.perf_counter() - started:.2f}s'
+        ))
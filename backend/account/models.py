@@ -1,19 +1,22 @@
 from uuid import uuid4
 from functools import partial
+from typing import NamedTuple, Optional
 
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils.crypto import get_random_string
 from django.utils import timezone
-from django.forms.models import model_to_dict
 from django.core.validators import FileExtensionValidator
 from core.utils.image_path import upload_person_portrait, upload_person_credentials
 from phonenumber_field.modelfields import PhoneNumber, PhoneNumberField
 
 from world.models import Country
+from world.registry import world_registry
 from inventory.models import Warehouse
 from account.validators import validate_possible_number
 
@@ -113,6 +116,59 @@ class User(AbstractBaseUser, PermissionsMixin):
 # LOOK
 # Set as default shipping address
 # Set as default billing address
+class AddressData(NamedTuple):
+    """
+    Immutable copy of an address' values, as stored on orders. Every value
+    is a plain str/int/None, so `_asdict()` is JSON-serializable as is.
+    """
+    address_name: str
+    first_name: str
+    last_name: str
+    company_name: Optional[str]
+    phone: str
+    street_address_1: str
+    street_address_2: str
+    city: str
+    city_area: str
+    postal_code: str
+    country: Optional[int]
+    country_area: str
+
+
+class AddressQuerySet(models.QuerySet):
+    def snapshots(self, key="pk"):
+        """{key: AddressData} for the addresses, read with values_list in one query"""
+        return {
+            row[0]: AddressData._make(_clean_address_values(row[1:]))
+            for row in self.values_list(key, *ADDRESS_DATA_ATTNAMES)
+        }
+
+    def bulk_copy(self, addresses, user=None):
+        """
+        Save a new copy of every address with one INSERT and return the
+        copies. They get new uuids and belong to `user`, or to the owner of
+        the original.
+        """
+        copies = []
+        for address in addresses:
+            copy = Address(**{attname: getattr(address, attname) for attname in ADDRESS_COPY_ATTNAMES})
+            if user is not None:
+                copy.user = user
+            copies.append(copy)
+        return self.bulk_create(copies)
+
+
+def _clean_address_values(values):
+    # The phone column comes back as a PhoneNumber, snapshots hold its E.164 string.
+    # as_e164 skips the settings lookup and validation of str(), unparsed input is kept as is.
+    values = list(values)
+    phone = values[ADDRESS_PHONE_INDEX]
+    if isinstance(phone, PhoneNumber):
+        phone = phone.as_e164 if phone.country_code else phone.raw_input
+    values[ADDRESS_PHONE_INDEX] = phone or ""
+    return values
+
+
 class Address(models.Model):
     uuid = models.UUIDField(default=uuid4, unique=True)
     user = models.ForeignKey(
@@ -140,31 +196,67 @@ class Address(models.Model):
     )
     country_area = models.CharField(_('Country Area'), max_length=128, blank=True, help_text='Northern America')
 
+    objects = AddressQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.address_name
     
+    def get_country(self):
+        """Return the country from the world registry, without a query"""
+        return world_registry.get_country(self.country_id)
+
     @property
     def fullname(self):
         fn = f'{self.first_name} {self.last_name}'
         return fn
     
+    def snapshot(self):
+        """Return the address values as an AddressData"""
+        return AddressData._make(_clean_address_values(getattr(self, attname) for attname in ADDRESS_DATA_ATTNAMES))
+
     def as_data(self):
         """
         Return the address as a dict
-        Result does not contain the primary key(id)
+        Result does not contain the primary key(id), the uuid or the owner
         """
-        data = model_to_dict(self, exclude=["id"])
-        return data
+        return self.snapshot()._asdict()
 
-    
     def get_copy(self):
         """Return a new instance of the same address"""
-        return Address.objects.create(**self.as_data())
+        return Address.objects.bulk_copy([self])[0]
     
     class Meta:
         verbose_name = _('Address')
         verbose_name_plural = _('Addresses')
 
+# Resolved once: AddressData fields to column attributes (country -> country_id)
+ADDRESS_DATA_ATTNAMES = tuple(Address._meta.get_field(name).attname for name in AddressData._fields)
+ADDRESS_COPY_ATTNAMES = ADDRESS_DATA_ATTNAMES + (Address._meta.get_field('user').attname,)
+ADDRESS_PHONE_INDEX = AddressData._fields.index('phone')
+
+def _full_name_expression(prefix=""):
+    # "first last" with surrounding spaces trimmed, NULL when both are empty
+    return NullIf(
+        Trim(Concat(F(f"{prefix}first_name"), Value(" "), F(f"{prefix}last_name"), output_field=models.CharField())),
+        Value(""),
+    )
+
+
+class CustomerUserQuerySet(models.QuerySet):
+    def with_display_name(self):
+        """
+        Annotate display_name, what get_full_name() returns, in SQL: the
+        customer's name, else the default shipping address' name, else the
+        email. get_full_name() then needs neither the address nor the user.
+        """
+        return self.annotate(display_name=Coalesce(
+            _full_name_expression(),
+            _full_name_expression("default_shipping_address__"),
+            F("user__email"),
+            output_field=models.CharField(),
+        ))
+
+
 class CustomerUser(models.Model):
     user = models.OneToOneField(
         User,
@@ -199,14 +291,21 @@ class CustomerUser(models.Model):
 
     note = models.TextField(_('Note') ,null=True, blank=True)
 
+    objects = CustomerUserQuerySet.as_manager()
+
     def get_full_name(self):
-        if self.first_name or self.last_name:
-            return f'{self.first_name} {self.last_name}'.strip()
-        if self.default_shipping_address:
-            first_name = self.default_shipping_address.first_name
-            last_name = self.default_shipping_address.last_name
-            if first_name or last_name:
-                return f'{first_name} {last_name}'.strip()
+        display_name = getattr(self, 'display_name', None)
+        if display_name is not None:
+            return display_name
+        # Same rules as with_display_name(), a name of only spaces counts as empty
+        full_name = f'{self.first_name} {self.last_name}'.strip(' ')
+        if full_name:
+            return full_name
+        if self.default_shipping_address_id is not None:
+            address = self.default_shipping_address
+            full_name = f'{address.first_name} {address.last_name}'.strip(' ')
+            if full_name:
+                return full_name
         return self.user.email
     
     class Meta:
@@ -0,0 +1,12 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsEmployee(BasePermission):
+    """Warehouse employees, managers and staff users"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and (user.is_employee or user.is_manager or user.is_staff)
+        )
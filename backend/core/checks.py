@@ -0,0 +1,27 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+
+
+def check_cache_tables(app_configs=None, databases=None, **kwargs):
+    """
+    System check: migrate does not create DatabaseCache tables, until
+    createcachetable runs every cached response and idempotent request
+    fails with "no such table".
+    """
+    errors = []
+    for alias in caches:
+        cache = caches[alias]
+        if not isinstance(cache, DatabaseCache):
+            continue
+        for database in databases or ():
+            if not router.allow_migrate_model(database, cache.cache_model_class):
+                continue
+            if cache._table not in connections[database].introspection.table_names():
+                errors.append(checks.Warning(
+                    f'The table {cache._table!r} of cache {alias!r} does not exist in database {database!r}.',
+                    hint='Run "python manage.py createcachetable".',
+                    id='core.W001',
+                ))
+    return errors
@@ -0,0 +1,73 @@
+"""
+A small in-process queue for slow side effects (emails, stock sync).
+
+defer() hands a task to the queue only when the current transaction
+commits, so a rolled back checkout never sends anything, and the request
+doesn't wait for it. Worker threads run the tasks; failures are logged.
+"""
+import logging
+import queue
+import threading
+
+from django.db import close_old_connections, transaction
+
+from core import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredQueue:
+    def __init__(self, workers=2, synchronous=False):
+        self.workers = workers
+        self.synchronous = synchronous
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'deferred-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception('Deferred task %s failed', getattr(func, '__name__', func))
+
+    def _work(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            # Worker threads keep their own connections, treat every task like a request
+            close_old_connections()
+            try:
+                self._run(func, args, kwargs)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def put(self, func, *args, **kwargs):
+        if self.synchronous:
+            self._run(func, args, kwargs)
+            return
+        self._start()
+        self._queue.put((func, args, kwargs))
+
+    def join(self):
+        """Wait until every queued task ran"""
+        self._queue.join()
+
+
+deferred_queue = DeferredQueue(
+    workers=settings.DEFERRED_QUEUE_WORKERS,
+    synchronous=settings.DEFERRED_QUEUE_SYNCHRONOUS,
+)
+
+
+def defer(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the deferred queue after the current transaction commits"""
+    transaction.on_commit(lambda: deferred_queue.put(func, *args, **kwargs))
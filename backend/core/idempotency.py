@@ -0,0 +1,120 @@
+from functools import wraps
+from hashlib import sha256
+
+from django.core import checks
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from core import settings
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+
+# Backends keeping entries in the memory of one process
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_idempotency_cache(app_configs=None, **kwargs):
+    """
+    System check: with a process-local cache a retry that reaches another
+    worker does not see the key and places the order again.
+    """
+    config = settings.CACHES.get(settings.IDEMPOTENCY_CACHE)
+    if config is None:
+        return [checks.Error(
+            f'IDEMPOTENCY_CACHE refers to the undefined cache {settings.IDEMPOTENCY_CACHE!r}.',
+            id='core.E001',
+        )]
+    if config.get('BACKEND') in PROCESS_LOCAL_CACHE_BACKENDS:
+        return [checks.Error(
+            f'IDEMPOTENCY_CACHE {settings.IDEMPOTENCY_CACHE!r} uses {config["BACKEND"]}, which is not shared '
+            f'between processes.',
+            hint='Use a cache every worker shares, e.g. DatabaseCache, Redis or Memcached.',
+            id='core.E002',
+        )]
+    return []
+
+
+def get_cache_key(request, key):
+    user = request.user.pk if request.user and request.user.is_authenticated else 'anonymous'
+    scope = f'{user}|{request.method}|{request.path}|{key}'
+    return f'idempotency:{sha256(scope.encode()).hexdigest()}'
+
+
+def get_fingerprint(request):
+    return sha256(request.body).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Decorate a write method of an APIView to honour an Idempotency-Key
+    header. The first request with a key runs and its response is stored
+    for IDEMPOTENCY_KEY_TTL. Retries with the same key and body get the
+    stored response replayed without running the view again. The same key
+    with a different body is rejected, and so is a retry that arrives
+    while the first request is still running. Requests without the header
+    run as usual.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'detail': 'Idempotency-Key is too long.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache = caches[settings.IDEMPOTENCY_CACHE]
+        cache_key = get_cache_key(request, key)
+        fingerprint = get_fingerprint(request)
+
+        # add() is atomic, only one request can take the key
+        if not cache.add(cache_key, {'state': IN_PROGRESS, 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            stored = cache.get(cache_key)
+            if stored is not None:
+                if stored['fingerprint'] != fingerprint:
+                    return Response(
+                        {'detail': 'Idempotency-Key was already used for a different request.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if stored['state'] == IN_PROGRESS:
+                    return Response(
+                        {'detail': 'A request with this Idempotency-Key is in progress.'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                response = Response(stored['data'], status=stored['status'])
+                response['Idempotent-Replayed'] = 'true'
+                return response
+            # Expired between add() and get(), take it now
+            cache.set(cache_key, {'state': IN_PROGRESS, 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except APIException as exc:
+            # Validation errors are final answers and are stored, server errors may be retried
+            if exc.status_code >= 500:
+                cache.delete(cache_key)
+                raise
+            response = self.handle_exception(exc)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, {
+                'state': DONE,
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+            }, settings.IDEMPOTENCY_KEY_TTL)
+        return response
+    return wrapper
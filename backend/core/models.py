@@ -5,6 +5,11 @@ from django.utils.crypto import get_random_string
 class SortableModel(models.Model):
     sort_order = models.IntegerField(null=True)
 
+    # sort_order değerleri arasında bırakılan boşluk
+    # 1 ise sıralama ardışıktır ve delete() aradaki boşluğu kapatmak için diğer satırları günceller
+    # Daha büyük bir değerde ekleme, silme ve taşıma sabit sayıda satıra dokunur
+    sort_order_gap = 1
+
     class Meta:
         abstract = True
 
@@ -25,17 +30,94 @@ class SortableModel(models.Model):
         if self.pk is None:
             qs = self.get_ordering_queryset()
             existing_max = self.get_max_sort_order(qs)
-            # Model ilk kez ekleniyorsa  0, aksi halde en yüksek sıralama değerine 1 eklenir
-            self.sort_order = 0 if existing_max is None else existing_max + 1
+            # Model ilk kez ekleniyorsa  0, aksi halde en yüksek sıralama değerine sort_order_gap eklenir
+            self.sort_order = 0 if existing_max is None else existing_max + self.sort_order_gap
         super().save(*args, **kwargs)
 
     @transaction.atomic
     def delete(self, *args, **kwargs):
-        if self.sort_order is not None:
+        if self.sort_order is not None and self.sort_order_gap == 1:
             qs = self.get_ordering_queryset()
             # Silinen nesnenin sort_order deperinden büyük olan diğer nesneler bulunur
             # update ile bulunan nesnelerin sıralama değeri 1 azaltılır böylece boşluklar doldurulmuş olur
             qs.filter(sort_order__gt=self.sort_order).update(
                 sort_order=F("sort_order") - 1
             )
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        super().delete(*args, **kwargs)
+
+    @classmethod
+    def _spread_ranks(cls, order, ranks, gap):
+        """
+        Give a rank to every pk of `order` missing from `ranks`, between its
+        ranked neighbours. Returns False if a run of pks does not fit.
+        """
+        index = 0
+        while index < len(order):
+            if order[index] in ranks:
+                index += 1
+                continue
+            run_end = index
+            while run_end < len(order) and order[run_end] not in ranks:
+                run_end += 1
+            run_length = run_end - index
+            prev_rank = ranks[order[index - 1]] if index > 0 else None
+            next_rank = ranks[order[run_end]] if run_end < len(order) else None
+
+            if prev_rank is None and next_rank is None:
+                prev_rank, next_rank = -gap, gap * run_length
+            elif prev_rank is None:
+                prev_rank = next_rank - gap * (run_length + 1)
+            elif next_rank is None:
+                next_rank = prev_rank + gap * (run_length + 1)
+
+            step = (next_rank - prev_rank) // (run_length + 1)
+            if step < 1:
+                return False
+            for offset, pk in enumerate(order[index:run_end], start=1):
+                ranks[pk] = prev_rank + step * offset
+            index = run_end
+        return True
+
+    @classmethod
+    @transaction.atomic
+    def move(cls, items, new_positions):
+        """
+        Move sibling items to new 0-based positions in their ordering.
+
+        Only the moved rows get a new sort_order, placed between their new
+        neighbours. When there is no room left between two neighbours the
+        whole ordering is rebalanced once with sort_order_gap spacing.
+        Raises ValueError, before writing anything, for items that are not
+        siblings of the first one.
+        """
+        items = list(items)
+        new_positions = list(new_positions)
+        if len(items) != len(new_positions):
+            raise ValueError("Every item needs exactly one new position")
+        if not items:
+            return
+        positions = dict(zip((item.pk for item in items), new_positions))
+
+        siblings = (
+            items[0].get_ordering_queryset()
+            .order_by("sort_order", "pk")
+            .values_list("pk", "sort_order")
+        )
+        current = {pk: sort_order for pk, sort_order in siblings}
+        foreign = [pk for pk in positions if pk not in current]
+        if foreign:
+            raise ValueError(f"Items {foreign} are not in the ordering of {items[0]!r}")
+
+        order = [pk for pk in current if pk not in positions]
+        for pk, position in sorted(positions.items(), key=lambda item: item[1]):
+            order.insert(min(position, len(order)), pk)
+
+        ranks = {pk: current[pk] for pk in order if pk not in positions}
+        if None in ranks.values() or not cls._spread_ranks(order, ranks, cls.sort_order_gap):
+            ranks = {pk: index * cls.sort_order_gap for index, pk in enumerate(order)}
+
+        changed = [cls(pk=pk, sort_order=rank) for pk, rank in ranks.items() if current.get(pk) != rank]
+        cls.objects.bulk_update(changed, ["sort_order"])
+
+        for item in items:
+            item.sort_order = ranks[item.pk]
@@ -0,0 +1,123 @@
+"""
+Fixed-size renditions (thumbnails) of uploaded images.
+
+A rendition is stored as MEDIA_ROOT/<THUMBNAIL_DIR>/<size>/<hash[:2]>/<hash>.<ext>
+where `hash` is the SHA-256 of the original's content, so re-uploading the
+same image reuses its renditions and a changed image never serves a stale
+one. Renditions are made on first request by RenditionView, or ahead of
+time by `manage.py warm_thumbnails`.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils._os import safe_join
+
+from core import settings
+from core.storage import hashed_name_digest
+
+HASH_CHUNK_SIZE = 1024 * 1024
+FORMAT_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def original_path(name):
+    # Raises SuspiciousFileOperation for names outside MEDIA_ROOT
+    return safe_join(settings.MEDIA_ROOT, name)
+
+
+def is_rendition_source(name):
+    """Whether `name` is a media file renditions may be made of, see THUMBNAIL_SOURCE_DIRS"""
+    if not name or name != posixpath.normpath(name) or name.startswith('/'):
+        return False
+    return name.startswith(settings.THUMBNAIL_SOURCE_DIRS)
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(name):
+    """
+    Content hash of a stored original. Content-addressed names already
+    carry it; other files are hashed once and cached by name, size and
+    modification time.
+    """
+    digest = hashed_name_digest(name)
+    if digest is not None:
+        return digest
+    path = original_path(name)
+    stat = os.stat(path)
+    key = f'rendition-hash:{hashlib.sha1(name.encode()).hexdigest()}:{stat.st_size}:{stat.st_mtime_ns}'
+    value = cache.get(key)
+    if value is None:
+        value = file_hash(path)
+        cache.set(key, value, None)
+    return value
+
+
+def rendition_name(digest, size):
+    extension = FORMAT_EXTENSIONS[settings.THUMBNAIL_FORMAT]
+    return f'{settings.THUMBNAIL_DIR}/{size}/{digest[:2]}/{digest}.{extension}'
+
+
+def render(source, target, dimensions, image_format, quality):
+    """
+    Write a rendition of `source` that fits in `dimensions` to `target`.
+    Module-level so it can run in a process pool.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        # JPEG can decode at a reduced scale directly, which is much cheaper
+        image.draft('RGB', dimensions)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(dimensions, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write next to the target and rename, concurrent readers never see a partial file
+        descriptor, partial = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.partial')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                image.save(file, image_format, quality=quality, method=4 if image_format == 'WEBP' else 0)
+            os.replace(partial, target)
+        except BaseException:
+            os.unlink(partial)
+            raise
+    return target
+
+
+def get_rendition(name, size):
+    """
+    Return the media name of the `size` rendition of the stored image `name`,
+    generating it when missing. Raises KeyError for unknown sizes and OSError
+    for missing or unreadable originals.
+    """
+    dimensions = settings.THUMBNAIL_SIZES[size]
+    target_name = rendition_name(content_hash(name), size)
+    target = os.path.join(settings.MEDIA_ROOT, target_name)
+    if not os.path.exists(target):
+        render(original_path(name), target, dimensions, settings.THUMBNAIL_FORMAT, settings.THUMBNAIL_QUALITY)
+    return target_name
+
+
+def rendition_url(name, size):
+    """URL that redirects to the rendition, for payloads; it costs no file access"""
+    return reverse('rendition', kwargs={'size': size, 'name': name})
+
+
+def rendition_urls(name):
+    if not name:
+        return None
+    return {size: rendition_url(name, size) for size in settings.THUMBNAIL_SIZES}
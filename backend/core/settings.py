@@ -105,6 +105,16 @@ DATABASES = {
     }
 }
 
+# The default cache must be shared by all processes: cached catalog structures,
+# their invalidation versions and idempotency keys are read by every worker.
+# Create the table with `python manage.py createcachetable`, or use Redis/Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -253,4 +263,43 @@ EMAIL_HOST_PASSWORD = 'lqukriyvjjggugsz'
 # EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 
 DEFAULT_DECIMAL_PLACES = 3
-DEFAULT_MAX_DIGITS = 12
\ No newline at end of file
+DEFAULT_MAX_DIGITS = 12
+
+# BARCODES
+# Producer codes are used in order, a new one is taken when the previous is exhausted.
+# All producer codes must have the same length.
+BARCODE_COUNTRY_CODE = '869'
+BARCODE_PRODUCER_CODES = ['1234']
+BARCODE_BLOCK_SIZE = 1000
+
+# WORLD
+# Cache alias used to share the world registry and its invalidations between processes.
+# None keeps it process-local: changes then only reach the process that made them.
+WORLD_REGISTRY_CACHE = 'default'
+WORLD_REGISTRY_CHECK_INTERVAL = 5
+
+# THUMBNAILS
+# Renditions are generated on first request and cached under MEDIA_ROOT/THUMBNAIL_DIR
+THUMBNAIL_DIR = 'thumbnails'
+THUMBNAIL_SIZES = {
+    'small': (160, 160),
+    'medium': (480, 480),
+    'large': (1024, 1024),
+}
+THUMBNAIL_FORMAT = 'WEBP'
+# Only images under these media directories have public renditions, account files stay private
+THUMBNAIL_SOURCE_DIRS = ('product/categories/', 'product/products/')
+THUMBNAIL_QUALITY = 80
+
+# DEFERRED TASKS
+# Worker threads of the in-process queue for slow side effects, synchronous runs them in the committing thread
+DEFERRED_QUEUE_WORKERS = 2
+DEFERRED_QUEUE_SYNCHRONOUS = False
+
+# IDEMPOTENCY
+# Cache alias keeping Idempotency-Key results. It must be shared by all processes,
+# a system check rejects process-local backends (LocMemCache, DummyCache).
+IDEMPOTENCY_CACHE = 'default'
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+# How long a key stays locked while its first request runs (seconds)
+IDEMPOTENCY_LOCK_TIMEOUT = 60
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def hashed_name_digest(name):
+    """SHA-256 of a file stored by ContentAddressedStorage, taken from its name, or None"""
+    stem = os.path.splitext(posixpath.basename(name or ''))[0]
+    return stem if HASHED_NAME_RE.match(stem) else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores a file as <upload_to directory>/<hh>/<hh>/<sha256><ext>.
+
+    The content is hashed chunk by chunk while it is still in the upload
+    buffer (or temporary file); when a file with the same hash exists the
+    upload is not written again and the existing name is returned, so
+    identical uploads share one file and never overwrite each other.
+    """
+
+    def hash_content(self, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def content_name(self, name, digest):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], digest[2:4], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, self.hash_content(content))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+content_addressed_storage = ContentAddressedStorage()
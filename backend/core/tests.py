@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import settings
+from core.checks import check_cache_tables
+from core.idempotency import check_idempotency_cache
+
+
+class RenditionViewTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        patcher = mock.patch.object(settings, 'MEDIA_ROOT', media_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ('product/products/photo.png', 'account/user/person/portrait/1.png'):
+            path = os.path.join(media_root, name)
+            os.makedirs(os.path.dirname(path))
+            Image.new('RGB', (50, 50), 'red').save(path)
+
+    def test_product_image(self):
+        response = self.client.get('/renditions/small/product/products/photo.png')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/thumbnails/small/', response['Location'])
+
+    def test_other_media_is_not_served(self):
+        for name in (
+            'account/user/person/portrait/1.png',
+            'product/products/../../account/user/person/portrait/1.png',
+            'product/products/missing.png',
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(f'/renditions/small/{name}').status_code, 404)
+
+    def test_decompression_bomb(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            response = self.client.get('/renditions/small/product/products/photo.png')
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyCacheCheckTests(TestCase):
+    def check(self, caches, alias='default'):
+        with mock.patch.object(settings, 'CACHES', caches), mock.patch.object(settings, 'IDEMPOTENCY_CACHE', alias):
+            return [error.id for error in check_idempotency_cache()]
+
+    def test_shared_cache(self):
+        self.assertEqual(self.check({'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache'}}), [])
+
+    def test_process_local_cache(self):
+        for backend in ('locmem.LocMemCache', 'dummy.DummyCache'):
+            with self.subTest(backend=backend):
+                caches = {'default': {'BACKEND': f'django.core.cache.backends.{backend}'}}
+                self.assertEqual(self.check(caches), ['core.E002'])
+
+    def test_undefined_cache(self):
+        self.assertEqual(self.check({'default': {}}, alias='idempotency'), ['core.E001'])
+
+
+class CacheTableCheckTests(TestCase):
+    databases = {'default'}
+
+    def check(self, location):
+        cache = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': location}
+        with override_settings(CACHES={'default': cache}):
+            return [error.id for error in check_cache_tables(databases=['default'])]
+
+    def test_existing_table(self):
+        self.assertEqual(self.check('django_cache'), [])
+
+    def test_missing_table(self):
+        self.assertEqual(self.check('missing_cache'), ['core.W001'])
+
+    def test_skipped_without_databases(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'missing_cache'
+        }}):
+            self.assertEqual(check_cache_tables(), [])
@@ -15,8 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+
+from core.views import RenditionView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/catalog/', include('product.urls')),
+    path('api/orders/', include('order.urls')),
+    path('api/inventory/', include('inventory.urls')),
+    path('renditions/<str:size>/<path:name>', RenditionView.as_view(), name='rendition'),
 ]
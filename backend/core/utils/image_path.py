@@ -1,18 +1,22 @@
+import os
+
+
+def get_extension(filename):
+    # splitext keeps names with several dots (photo.final.jpg) and without any working
+    return os.path.splitext(filename)[1].lower()
+
 # ACCOUNT
 def upload_person_portrait(instance, filename):
-    filebase, extension = filename.rsplit(".")
-    return f'account/user/person/portrait/{instance.number}.{extension}'
+    return f'account/user/person/portrait/{instance.number}{get_extension(filename)}'
 
 def upload_person_credentials(instance, filename):
-    filebase, extension = filename.rsplit(".")
-    return f'account/user/person/credentials/{instance.number}.{extension}'
+    return f'account/user/person/credentials/{instance.number}{get_extension(filename)}'
 
 # PRODUCT
+# Product images are stored with ContentAddressedStorage, which replaces the file name with its content hash
 def upload_category_background_image(instance, filename):
-    filebase, extension = filename.rsplit(".")
-    return f'product/categories/{instance.slug}.{extension}'
+    return f'product/categories/{instance.slug}{get_extension(filename)}'
     
 
 def upload_product_media(instance, filename):
-    filebase, extension = filename.rsplit(".")
-    return f'product/products/{instance.product.uuid}.{extension}'
+    return f'product/products/{instance.product.uuid}{get_extension(filename)}'
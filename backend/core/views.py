@@ -0,0 +1,30 @@
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from django.views import View
+from PIL import Image
+
+from core.renditions import get_rendition, is_rendition_source
+
+
+class RenditionView(View):
+    """
+    Redirect to a rendition of a stored product or category image,
+    generating it on the first request. The redirect may be cached, the
+    rendition name changes with the content of the original.
+    """
+    cache_timeout = 60 * 60 * 24
+
+    def get(self, request, size, name):
+        if not is_rendition_source(name):
+            raise Http404('No such image or size')
+        try:
+            rendition = get_rendition(name, size)
+        except (KeyError, OSError, SuspiciousFileOperation):
+            raise Http404('No such image or size')
+        except Image.DecompressionBombError:
+            return HttpResponseBadRequest('Image is too large')
+        response = HttpResponseRedirect(default_storage.url(rendition))
+        patch_cache_control(response, public=True, max_age=self.cache_timeout)
+        return response
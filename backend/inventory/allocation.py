@@ -0,0 +1,166 @@
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.dispatch import Signal
+
+from inventory.error_codes import InventoryErrorCode
+from inventory.models import Stock
+
+StockReservation = namedtuple(
+    "StockReservation", ["stock_id", "warehouse_id", "product_variant_id", "quantity"]
+)
+
+# Sent with variant_ids and quantities (variant id -> available quantity)
+# when stock levels changed, for integrations that mirror stock elsewhere
+stock_levels_changed = Signal()
+
+# How many times the candidate stocks of a variant are re-read when the rows
+# seen first could not cover the line, e.g. other checkouts emptied them
+MAX_RESERVE_ATTEMPTS = 3
+
+
+def check_quantity_limits(lines, already_bought=None):
+    """
+    Raise ValidationError when a line goes over the variant's
+    quantity_limit_per_customer, counting `already_bought` (variant id ->
+    quantity the customer already has).
+    """
+    already_bought = already_bought or {}
+    for variant, quantity in lines:
+        limit = variant.quantity_limit_per_customer
+        if limit is not None and quantity + already_bought.get(variant.pk, 0) > limit:
+            raise ValidationError(
+                f"You can buy at most {limit} of {variant}.",
+                code=InventoryErrorCode.QUANTITY_LIMIT_EXCEEDED.value,
+            )
+
+
+def _take(stock_id, quantity):
+    """Allocate `quantity` of a stock row if it is still free, with one conditional UPDATE"""
+    return Stock.objects.filter(
+        pk=stock_id, quantity__gte=F("quantity_allocated") + quantity
+    ).update(quantity_allocated=F("quantity_allocated") + quantity)
+
+
+def _reserve_variant(variant, quantity, warehouse_ids):
+    """
+    Reserve `quantity` of one variant, spread over as many warehouses as
+    needed. Each warehouse is taken with a conditional F() update, so the
+    row is only locked for the update itself and two checkouts can never
+    allocate the same units. When another checkout took part of a row
+    between our read and our update, the row is re-read and what is still
+    free is taken.
+    """
+    reservations = []
+    remaining = quantity
+
+    for _attempt in range(MAX_RESERVE_ATTEMPTS):
+        stocks = Stock.objects.filter(product_variant_id=variant.pk, quantity__gt=F("quantity_allocated"))
+        if warehouse_ids is not None:
+            stocks = stocks.filter(warehouse_id__in=warehouse_ids)
+        # A stable order keeps concurrent baskets from locking rows crosswise
+        candidates = stocks.order_by("pk").values_list("pk", "warehouse_id", "quantity", "quantity_allocated")
+        if not candidates:
+            break
+
+        for stock_id, warehouse_id, stock_quantity, allocated in candidates:
+            available = stock_quantity - allocated
+            while available > 0:
+                take = min(remaining, available)
+                if _take(stock_id, take):
+                    reservations.append(StockReservation(stock_id, warehouse_id, variant.pk, take))
+                    remaining -= take
+                    break
+                # Every failed update means another checkout allocated from this row
+                available = Stock.objects.filter(pk=stock_id).values_list(
+                    F("quantity") - F("quantity_allocated"), flat=True
+                ).first() or 0
+            if not remaining:
+                return reservations
+
+    raise ValidationError(
+        f"Insufficient stock for {variant}.",
+        code=InventoryErrorCode.INSUFFICIENT_STOCK.value,
+    )
+
+
+@transaction.atomic
+def reserve_stocks(lines, warehouse_ids=None, already_bought=None):
+    """
+    Reserve stock for a basket.
+
+    Args:
+        lines: (ProductVariant, quantity) pairs.
+        warehouse_ids: Restrict the reservation to these warehouses.
+        already_bought: Variant id -> quantity the customer already bought,
+            checked against quantity_limit_per_customer.
+
+    Returns:
+        list[StockReservation]: What was reserved in which warehouse.
+
+    Either every line is reserved or, on ValidationError, nothing is.
+    """
+    quantities = {}
+    variants = {}
+    for variant, quantity in lines:
+        quantities[variant.pk] = quantities.get(variant.pk, 0) + quantity
+        variants[variant.pk] = variant
+    merged = [(variants[variant_id], quantity) for variant_id, quantity in quantities.items()]
+    check_quantity_limits(merged, already_bought)
+
+    reservations = []
+    for variant, quantity in sorted(merged, key=lambda line: line[0].pk):
+        reservations.extend(_reserve_variant(variant, quantity, warehouse_ids))
+    return reservations
+
+
+@transaction.atomic
+def release_stocks(reservations):
+    """Give reserved quantities back, e.g. when a checkout is abandoned"""
+    for reservation in reservations:
+        Stock.objects.filter(pk=reservation.stock_id).update(
+            quantity_allocated=F("quantity_allocated") - reservation.quantity
+        )
+
+
+@transaction.atomic
+def fulfil_stocks(reservations):
+    """Take reserved quantities out of the stock once they are shipped"""
+    for reservation in reservations:
+        Stock.objects.filter(pk=reservation.stock_id).update(
+            quantity=F("quantity") - reservation.quantity,
+            quantity_allocated=F("quantity_allocated") - reservation.quantity,
+        )
+
+
+def get_available_quantities(variant_ids):
+    """Variant id -> quantity available over all warehouses, with one query"""
+    rows = (
+        Stock.objects.filter(product_variant_id__in=variant_ids)
+        .values("product_variant_id")
+        .annotate(available=Sum(F("quantity") - F("quantity_allocated")))
+        .values_list("product_variant_id", "available")
+    )
+    quantities = dict.fromkeys(variant_ids, 0)
+    quantities.update(rows)
+    return quantities
+
+
+@transaction.atomic
+def adjust_stock(warehouse_id, variant_id, delta):
+    """
+    Add `delta` (may be negative) to the quantity of a variant in a
+    warehouse, never below what is allocated. Returns the new quantity.
+    """
+    stock, _created = Stock.objects.get_or_create(warehouse_id=warehouse_id, product_variant_id=variant_id)
+    updated = Stock.objects.filter(
+        pk=stock.pk, quantity__gte=F("quantity_allocated") - delta
+    ).update(quantity=F("quantity") + delta)
+    if not updated:
+        raise ValidationError(
+            "The quantity can't go below the allocated quantity.",
+            code=InventoryErrorCode.INSUFFICIENT_STOCK.value,
+        )
+    return Stock.objects.values_list("quantity", flat=True).get(pk=stock.pk)
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class InventoryErrorCode(Enum):
+    INSUFFICIENT_STOCK = "insufficient_stock"
+    QUANTITY_LIMIT_EXCEEDED = "quantity_limit_exceeded"
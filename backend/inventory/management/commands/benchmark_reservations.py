@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import F, Sum
+
+from inventory.allocation import release_stocks, reserve_stocks
+from inventory.models import Stock
+from product.models import ProductVariant
+
+
+class Command(BaseCommand):
+    help = (
+        'Reserve the same SKU from many threads until it is sold out, check that nothing was oversold and '
+        'report reservations per second. Every reservation is released at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variant', type=int, help='Variant id, defaults to the one with the most free stock')
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--quantity', type=int, default=1, help='Units per reservation')
+
+    def get_variant(self, variant_id):
+        stocks = Stock.objects.values('product_variant_id').annotate(free=Sum(F('quantity') - F('quantity_allocated')))
+        if variant_id is not None:
+            stocks = stocks.filter(product_variant_id=variant_id)
+        row = stocks.filter(free__gt=0).order_by('-free').first()
+        if row is None:
+            raise CommandError('No variant with free stock')
+        return ProductVariant.objects.get(pk=row['product_variant_id']), row['free']
+
+    def handle(self, *args, **options):
+        if min(options['threads'], options['quantity']) < 1:
+            raise CommandError('--threads and --quantity must be at least 1')
+        variant, free = self.get_variant(options['variant'])
+        allocated_before = Stock.objects.filter(product_variant=variant).aggregate(total=Sum('quantity_allocated'))['total']
+        lock = threading.Lock()
+        reserved = []
+        errors = {'database': 0}
+
+        def work():
+            try:
+                while True:
+                    try:
+                        reservations = reserve_stocks([(variant, options['quantity'])])
+                    except ValidationError:
+                        return
+                    except DatabaseError:
+                        # e.g. "database is locked" on SQLite, try again
+                        with lock:
+                            errors['database'] += 1
+                        continue
+                    with lock:
+                        reserved.extend(reservations)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=work) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        units = sum(reservation.quantity for reservation in reserved)
+        stocks = Stock.objects.filter(product_variant=variant)
+        allocated = stocks.aggregate(total=Sum('quantity_allocated'))['total'] - allocated_before
+        oversold = stocks.filter(quantity_allocated__gt=F('quantity')).exists()
+        release_stocks(reserved)
+
+        self.stdout.write(
+            f'{connection.vendor}: {len(reserved)} reservations of {units}/{free} free units of {variant.sku} '
+            f"with {options['threads']} threads, {errors['database']} database errors retried"
+        )
+        if oversold or allocated != units or units > free:
+            raise CommandError(f'Oversold: {allocated} units allocated for {units} reserved')
+        self.stdout.write(self.style.SUCCESS(
+            f'No overselling, {len(reserved) / elapsed if elapsed else 0:.0f} reservations/s ({elapsed:.2f}s)'
+        ))
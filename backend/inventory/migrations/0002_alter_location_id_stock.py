@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('product', '0002_productmedia_product_pro_product_9def6a_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.CreateModel(
+            name='Stock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Quantity')),
+                ('quantity_allocated', models.PositiveIntegerField(default=0, verbose_name='Allocated Quantity')),
+                ('product_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stocks', to='product.productvariant', verbose_name='Product Variant')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stocks', to='inventory.warehouse', verbose_name='Warehouse')),
+            ],
+            options={
+                'verbose_name': 'Stock',
+                'verbose_name_plural': 'Stocks',
+                'constraints': [models.CheckConstraint(condition=models.Q(('quantity_allocated__lte', models.F('quantity'))), name='stock_allocated_lte_quantity')],
+                'unique_together': {('warehouse', 'product_variant')},
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F, Q
 from django.utils.translation import gettext_lazy as _
 
 # MODELS
@@ -35,3 +36,37 @@ class Warehouse(models.Model):
         verbose_name=_('Location'),
         null=True
     )
+
+class Stock(models.Model):
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='stocks',
+        verbose_name=_('Warehouse')
+    )
+    product_variant = models.ForeignKey(
+        'product.ProductVariant',
+        on_delete=models.CASCADE,
+        related_name='stocks',
+        verbose_name=_('Product Variant')
+    )
+    quantity = models.PositiveIntegerField(_('Quantity'), default=0)
+    quantity_allocated = models.PositiveIntegerField(_('Allocated Quantity'), default=0)
+
+    @property
+    def quantity_available(self):
+        return self.quantity - self.quantity_allocated
+
+    def __str__(self) -> str:
+        return f'{self.product_variant} @ {self.warehouse}'
+
+    class Meta:
+        unique_together = ('warehouse', 'product_variant')
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(quantity_allocated__lte=F('quantity')),
+                name='stock_allocated_lte_quantity'
+            )
+        ]
+        verbose_name = _('Stock')
+        verbose_name_plural = _('Stocks')
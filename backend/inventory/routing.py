@@ -0,0 +1,209 @@
+import heapq
+import math
+import threading
+
+from django.db.models import Count, F, Q
+
+from inventory.models import Stock, Warehouse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Orders are routed in chunks so the (orders x warehouses) distance matrix stays small
+ROUTING_CHUNK_SIZE = 4096
+
+
+def haversine_km(latitude_1, longitude_1, latitude_2, longitude_2):
+    """Great-circle distance in km between two points given in degrees"""
+    latitude_1, longitude_1, latitude_2, longitude_2 = map(
+        math.radians, (latitude_1, longitude_1, latitude_2, longitude_2)
+    )
+    a = (
+        math.sin((latitude_2 - latitude_1) / 2) ** 2
+        + math.cos(latitude_1) * math.cos(latitude_2) * math.sin((longitude_2 - longitude_1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def get_destination_coordinates(destination):
+    """
+    Return (latitude, longitude) for a destination: a (lat, lon) pair or an
+    account Address. Addresses without coordinates fall back to their
+    country's, read from the world registry without a query.
+    """
+    if isinstance(destination, (tuple, list)):
+        return float(destination[0]), float(destination[1])
+
+    latitude = getattr(destination, "latitude", None)
+    longitude = getattr(destination, "longitude", None)
+    if latitude is not None and longitude is not None:
+        return float(latitude), float(longitude)
+
+    country = destination.get_country()
+    if country is None:
+        return None
+    return float(country.latitude), float(country.longitude)
+
+
+def get_warehouses_with_stock(lines):
+    """
+    Return the ids of the warehouses that can ship every (variant id,
+    quantity) line on their own, with a single query.
+    """
+    lines = dict(lines)
+    if not lines:
+        return set()
+    line_filter = Q()
+    for variant_id, quantity in lines.items():
+        line_filter |= Q(product_variant_id=variant_id, quantity__gte=F("quantity_allocated") + quantity)
+    return set(
+        Stock.objects.filter(line_filter)
+        .values("warehouse_id")
+        .annotate(lines=Count("product_variant_id", distinct=True))
+        .filter(lines=len(lines))
+        .values_list("warehouse_id", flat=True)
+    )
+
+
+class WarehouseIndex:
+    """
+    In-memory index of warehouse coordinates.
+
+    With the handful to few hundred warehouses a store has, a vectorized
+    haversine over all of them is faster than walking a tree, so lookups
+    compute one distance row per destination with NumPy.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.warehouse_ids = [row[0] for row in rows]
+        self.coordinates = [(float(row[1]), float(row[2])) for row in rows]
+        if np is not None:
+            self._ids = np.array(self.warehouse_ids, dtype=np.int64)
+            radians = np.radians(np.array(self.coordinates, dtype=np.float64).reshape(-1, 2))
+            self._latitudes, self._longitudes = radians[:, 0], radians[:, 1]
+            self._cos_latitudes = np.cos(self._latitudes)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            Warehouse.objects.filter(location__latitude__isnull=False, location__longitude__isnull=False)
+            .order_by("pk")
+            .values_list("pk", "location__latitude", "location__longitude")
+        )
+
+    def __len__(self):
+        return len(self.warehouse_ids)
+
+    def _distances(self, latitudes, longitudes, columns):
+        """(n, m) matrix of distances in km from n destinations to the selected warehouses"""
+        latitudes = np.radians(latitudes)[:, None]
+        longitudes = np.radians(longitudes)[:, None]
+        a = (
+            np.sin((self._latitudes[columns] - latitudes) / 2) ** 2
+            + np.cos(latitudes) * self._cos_latitudes[columns]
+            * np.sin((self._longitudes[columns] - longitudes) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def nearest_many(self, coordinates, k=1, warehouse_ids=None):
+        """
+        Route many destinations at once.
+
+        Args:
+            coordinates: (latitude, longitude) pairs, None for unknown destinations.
+            k: How many warehouses to return per destination.
+            warehouse_ids: Only consider these warehouses, e.g. the ones with stock.
+
+        Returns:
+            list: For every destination a list of (warehouse_id, distance_km),
+            nearest first. Empty when the destination is unknown.
+        """
+        coordinates = list(coordinates)
+        results = [[] for _coordinate in coordinates]
+        known = [index for index, coordinate in enumerate(coordinates) if coordinate is not None]
+        allowed = None if warehouse_ids is None else set(warehouse_ids)
+
+        if np is None:
+            candidates = [
+                (warehouse_id, coordinate)
+                for warehouse_id, coordinate in zip(self.warehouse_ids, self.coordinates)
+                if allowed is None or warehouse_id in allowed
+            ]
+            for index in known:
+                latitude, longitude = coordinates[index]
+                results[index] = heapq.nsmallest(k, (
+                    (warehouse_id, haversine_km(latitude, longitude, *coordinate))
+                    for warehouse_id, coordinate in candidates
+                ), key=lambda item: item[1])
+            return results
+
+        columns = np.arange(len(self.warehouse_ids))
+        if allowed is not None:
+            columns = columns[np.isin(self._ids, list(allowed))]
+        k = min(k, len(columns))
+        if not k or not known:
+            return results
+
+        points = np.array([coordinates[index] for index in known], dtype=np.float64).reshape(-1, 2)
+        for start in range(0, len(known), ROUTING_CHUNK_SIZE):
+            chunk = points[start:start + ROUTING_CHUNK_SIZE]
+            distances = self._distances(chunk[:, 0], chunk[:, 1], columns)
+            if k < len(columns):
+                nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(len(columns)), distances.shape)
+            nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+            nearest_ids = self._ids[columns][nearest]
+
+            for offset, (ids, kms) in enumerate(zip(nearest_ids.tolist(), nearest_distances.tolist())):
+                results[known[start + offset]] = list(zip(ids, kms))
+        return results
+
+    def nearest(self, latitude, longitude, k=1, warehouse_ids=None):
+        return self.nearest_many([(latitude, longitude)], k=k, warehouse_ids=warehouse_ids)[0]
+
+
+_warehouse_index = None
+_warehouse_index_lock = threading.Lock()
+
+
+def get_warehouse_index():
+    global _warehouse_index
+    if _warehouse_index is None:
+        with _warehouse_index_lock:
+            if _warehouse_index is None:
+                _warehouse_index = WarehouseIndex.build()
+    return _warehouse_index
+
+
+def invalidate_warehouse_index():
+    global _warehouse_index
+    _warehouse_index = None
+
+
+def find_nearest_warehouses(destination, lines=None, k=1):
+    """
+    Return up to k (warehouse_id, distance_km) pairs, nearest first, for an
+    Address or (lat, lon) destination. With `lines` ((variant id, quantity)
+    pairs) only warehouses that can ship all of them are considered.
+    """
+    coordinates = get_destination_coordinates(destination)
+    if coordinates is None:
+        return []
+    warehouse_ids = None if lines is None else get_warehouses_with_stock(lines)
+    return get_warehouse_index().nearest(*coordinates, k=k, warehouse_ids=warehouse_ids)
+
+
+def route_destinations(destinations, lines=None, k=1):
+    """Batch version of find_nearest_warehouses for many destinations sharing `lines`"""
+    warehouse_ids = None if lines is None else get_warehouses_with_stock(lines)
+    coordinates = [get_destination_coordinates(destination) for destination in destinations]
+    return get_warehouse_index().nearest_many(coordinates, k=k, warehouse_ids=warehouse_ids)
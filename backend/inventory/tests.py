@@ -1,3 +1,97 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+
+from inventory import allocation
+from inventory.allocation import release_stocks, reserve_stocks
+from inventory.models import Stock, Warehouse
+from product.models import Product, ProductType, ProductVariant
+
+
+def create_variant(sku='SKU'):
+    product_type, _created = ProductType.objects.get_or_create(name='Type', slug='type')
+    product = Product.objects.create(product_type=product_type, name=sku, slug=sku.lower())
+    return ProductVariant.objects.create(product=product, sku=sku, selling_price=10)
+
+
+class ReserveStocksTests(TestCase):
+    def setUp(self):
+        self.variant = create_variant()
+        self.warehouses = [Warehouse.objects.create(name=name) for name in ('A', 'B')]
+
+    def stock(self, warehouse, quantity):
+        return Stock.objects.create(warehouse=warehouse, product_variant=self.variant, quantity=quantity)
+
+    def test_spreads_over_warehouses(self):
+        first, second = self.stock(self.warehouses[0], 3), self.stock(self.warehouses[1], 10)
+        reservations = reserve_stocks([(self.variant, 5)])
+        self.assertEqual([(reservation.stock_id, reservation.quantity) for reservation in reservations], [
+            (first.pk, 3), (second.pk, 2),
+        ])
+        release_stocks(reservations)
+        self.assertFalse(Stock.objects.filter(quantity_allocated__gt=0).exists())
+
+    def test_insufficient_stock_reserves_nothing(self):
+        self.stock(self.warehouses[0], 3)
+        with self.assertRaises(ValidationError):
+            reserve_stocks([(self.variant, 4)])
+        self.assertEqual(Stock.objects.get().quantity_allocated, 0)
+
+    def test_rows_partly_taken_by_other_checkouts_are_retried(self):
+        for warehouse in self.warehouses:
+            self.stock(warehouse, 10)
+        take = allocation._take
+        competing = []
+
+        def take_after_another_checkout(stock_id, quantity):
+            # Another checkout allocates one unit between our read and our update, five times
+            if len(competing) < 5:
+                competing.append(Stock.objects.filter(pk=stock_id).update(quantity_allocated=F('quantity_allocated') + 1))
+            return take(stock_id, quantity)
+
+        with mock.patch.object(allocation, '_take', side_effect=take_after_another_checkout):
+            reservations = reserve_stocks([(self.variant, 15)])
+        self.assertEqual(sum(reservation.quantity for reservation in reservations), 15)
+        self.assertEqual(sum(Stock.objects.values_list('quantity_allocated', flat=True)), 20)
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    threads = 8
+    quantity = 50
+
+    def test_many_threads_never_oversell(self):
+        variant = create_variant()
+        for name in ('A', 'B'):
+            Stock.objects.create(warehouse=Warehouse.objects.create(name=name), product_variant=variant, quantity=self.quantity)
+        reserved = []
+        lock = threading.Lock()
+
+        def work():
+            try:
+                while True:
+                    try:
+                        reservations = reserve_stocks([(variant, 3)])
+                    except ValidationError:
+                        return
+                    except DatabaseError:
+                        # SQLite lets one writer at a time, a locked database is a retry
+                        continue
+                    with lock:
+                        reserved.extend(reservations)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        allocated = sum(Stock.objects.values_list('quantity_allocated', flat=True))
+        self.assertEqual(allocated, sum(reservation.quantity for reservation in reserved))
+        # 100 units in lines of 3: 33 baskets, the last unit can't be sold
+        self.assertEqual(allocated, 99)
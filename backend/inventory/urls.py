@@ -0,0 +1,9 @@
+from django.urls import path
+
+from inventory import views
+
+app_name = 'inventory'
+
+urlpatterns = [
+    path('stocks/adjust/', views.StockAdjustmentView.as_view(), name='stock-adjust'),
+]
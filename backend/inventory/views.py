@@ -1,3 +1,33 @@
-from django.shortcuts import render
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from account.permissions import IsEmployee
+from core.idempotency import idempotent
+from inventory.allocation import adjust_stock
+from inventory.models import Warehouse
+from product.models import ProductVariant
+
+
+class StockAdjustmentView(APIView):
+    """
+    Add to or take from the stock of a variant in a warehouse.
+    POST {"warehouse_id", "variant_id", "delta"} -> {"quantity"}
+    Send an Idempotency-Key header so a retried adjustment is applied once.
+    """
+    permission_classes = (IsEmployee,)
+
+    @idempotent
+    def post(self, request):
+        data = request.data
+        warehouse_id, variant_id, delta = data.get('warehouse_id'), data.get('variant_id'), data.get('delta')
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in (warehouse_id, variant_id, delta)):
+            raise ValidationError({'detail': 'warehouse_id, variant_id and delta must be integers.'})
+        if not Warehouse.objects.filter(pk=warehouse_id).exists() or not ProductVariant.objects.filter(pk=variant_id).exists():
+            raise ValidationError({'detail': 'Unknown warehouse or variant.'})
+        try:
+            quantity = adjust_stock(warehouse_id, variant_id, delta)
+        except DjangoValidationError as exc:
+            raise ValidationError({'code': exc.code, 'detail': exc.messages})
+        return Response({'warehouse_id': warehouse_id, 'variant_id': variant_id, 'quantity': quantity})
@@ -0,0 +1,10 @@
+class OrderStatus:
+    UNFULFILLED = "unfulfilled"
+    FULFILLED = "fulfilled"
+    CANCELED = "canceled"
+
+    CHOICES = [
+        (UNFULFILLED, "Unfulfilled"),
+        (FULFILLED, "Fulfilled"),
+        (CANCELED, "Canceled"),
+    ]
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
-# Register your models here.
+from order.models import Order, OrderLine
+
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    raw_id_fields = ('variant',)
+    readonly_fields = ('product_name', 'variant_name', 'sku', 'quantity', 'unit_price', 'total_price', 'unit_weight')
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('uuid', 'customer_email', 'status', 'total_price', 'line_count', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('uuid', 'customer_email')
+    raw_id_fields = ('customer',)
+    inlines = (OrderLineInline,)
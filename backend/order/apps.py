@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class OrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'order'
+
+    def ready(self):
+        from core.checks import check_cache_tables
+        from core.idempotency import check_idempotency_cache
+
+        # Checkout is the idempotent endpoint, its keys must be visible to every worker
+        checks.register(check_idempotency_cache, checks.Tags.caches)
+        # The default cache lives in the database, migrate alone leaves it without a table
+        checks.register(check_cache_tables, checks.Tags.caches, checks.Tags.database)
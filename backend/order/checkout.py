@@ -0,0 +1,136 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+
+from account.models import AddressData, CustomerUser
+from core.deferred import defer
+from inventory.allocation import check_quantity_limits, reserve_stocks
+from order import OrderStatus
+from order.error_codes import OrderErrorCode
+from order.models import Order, OrderLine
+from order.tasks import send_order_confirmation, sync_stock_levels
+from product.models import ProductVariant
+from product.weights import basket_weight_grams, to_weight
+
+
+def address_snapshot(address):
+    """An Address or AddressData as JSON-serializable data for the order"""
+    if not isinstance(address, AddressData):
+        address = address.snapshot()
+    return address._asdict()
+
+
+def merge_lines(lines):
+    """Sum (variant id, quantity) pairs per variant, validating quantities"""
+    quantities = {}
+    for variant_id, quantity in lines:
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise ValidationError(
+                "Quantities must be positive integers.", code=OrderErrorCode.INVALID_QUANTITY.value
+            )
+        quantities[variant_id] = quantities.get(variant_id, 0) + quantity
+    if not quantities:
+        raise ValidationError("An order needs at least one line.", code=OrderErrorCode.EMPTY_ORDER.value)
+    return quantities
+
+
+def get_already_bought(customer, variants):
+    """
+    Quantities the customer already ordered of the variants that have a
+    per-customer limit. Call it in the transaction that writes the order:
+    the customer row stays locked until it ends, so concurrent checkouts of
+    one customer can't both count the same previous orders.
+    """
+    limited = [variant.pk for variant in variants if variant.quantity_limit_per_customer is not None]
+    if customer is None or not limited:
+        return {}
+    # Locked until the transaction ends, a no-op on SQLite which locks the whole database
+    list(CustomerUser.objects.select_for_update().filter(pk=customer.pk).values_list("pk", flat=True))
+    return dict(
+        OrderLine.objects.filter(order__customer=customer, variant_id__in=limited)
+        .exclude(order__status=OrderStatus.CANCELED)
+        .values("variant_id")
+        .annotate(quantity=Sum("quantity"))
+        .values_list("variant_id", "quantity")
+    )
+
+
+def place_order(customer, lines, shipping_address, billing_address=None, reserve=True, warehouse_ids=None):
+    """
+    Place an order for (variant id, quantity) pairs. Addresses are Address
+    or AddressData instances.
+
+    Everything that can be read or computed up front is: variants with
+    their products in one query, price and weight snapshots, address
+    snapshots. The transaction then only counts what the customer already
+    bought of limited variants, reserves stock and writes the order with
+    one INSERT for all its lines. Emails and stock sync run on the deferred
+    queue once it committed.
+
+    Raises ValidationError for invalid lines and insufficient stock.
+    """
+    quantities = merge_lines(lines)
+    variants = (
+        ProductVariant.objects.with_weight_grams()
+        .select_related("product")
+        # weight_grams replaces both, skip building two Weight objects per line
+        .defer("weight", "product__weight")
+        .filter(product__is_active=True)
+        .in_bulk(list(quantities))
+    )
+    missing = quantities.keys() - variants.keys()
+    if missing:
+        raise ValidationError(
+            f"Unknown product variants: {', '.join(str(variant_id) for variant_id in sorted(missing, key=str))}.",
+            code=OrderErrorCode.VARIANT_NOT_FOUND.value,
+        )
+
+    order_lines = []
+    total_price = 0
+    for variant_id, quantity in quantities.items():
+        variant = variants[variant_id]
+        line_price = variant.selling_price * quantity
+        order_lines.append(OrderLine(
+            variant=variant,
+            product_name=variant.product.name,
+            variant_name=variant.name,
+            sku=variant.sku,
+            quantity=quantity,
+            unit_price=variant.selling_price,
+            total_price=line_price,
+            # Grams, MeasurementField stores plain floats as its standard unit
+            unit_weight=variant.weight_grams,
+        ))
+        total_price += line_price
+    total_grams = basket_weight_grams(
+        quantities.items(), {variant_id: variant.weight_grams for variant_id, variant in variants.items()}
+    )
+
+    shipping = address_snapshot(shipping_address)
+    billing = address_snapshot(billing_address) if billing_address is not None else shipping
+    basket = [(variants[variant_id], quantity) for variant_id, quantity in quantities.items()]
+
+    with transaction.atomic():
+        already_bought = get_already_bought(customer, variants.values())
+        if reserve:
+            reserve_stocks(basket, warehouse_ids=warehouse_ids, already_bought=already_bought)
+        else:
+            check_quantity_limits(basket, already_bought)
+        order = Order.objects.create(
+            customer=customer,
+            customer_email=customer.user.email if customer is not None else "",
+            shipping_address=shipping,
+            billing_address=billing,
+            total_price=total_price,
+            total_weight=to_weight(total_grams),
+            line_count=len(order_lines),
+        )
+        for line in order_lines:
+            line.order = order
+        OrderLine.objects.bulk_create(order_lines)
+
+        defer(send_order_confirmation, order.pk)
+        if reserve:
+            defer(sync_stock_levels, list(quantities))
+    order.prefetched_lines = order_lines
+    return order
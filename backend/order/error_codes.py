@@ -0,0 +1,7 @@
+from enum import Enum
+
+class OrderErrorCode(Enum):
+    EMPTY_ORDER = "empty_order"
+    INVALID_QUANTITY = "invalid_quantity"
+    VARIANT_NOT_FOUND = "variant_not_found"
+    ADDRESS_NOT_FOUND = "address_not_found"
@@ -0,0 +1,99 @@
+import random
+import statistics
+import threading
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test.utils import override_settings
+
+from account.models import Address
+from core.deferred import deferred_queue
+from inventory.models import Stock
+from order.checkout import place_order
+
+
+class Command(BaseCommand):
+    help = (
+        'Place orders from several threads and report orders per second. Orders are really written and '
+        'stock is allocated: run it against a scratch copy of the database (SQLite or PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--lines', type=int, default=3, help='Lines per order')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def baskets(self, options):
+        """place_order() arguments for every order, drawn from customer addresses and variants in stock"""
+        addresses = list(Address.objects.select_related('user__user').order_by('pk')[:1000])
+        variant_ids = list(
+            Stock.objects.filter(quantity__gt=F('quantity_allocated'), product_variant__product__is_active=True)
+            .order_by('product_variant_id').values_list('product_variant_id', flat=True).distinct()[:10000]
+        )
+        if not addresses or not variant_ids:
+            raise CommandError('The benchmark needs customers with an address and active variants in stock')
+        rng = random.Random(options['seed'])
+        lines = min(options['lines'], len(variant_ids))
+        return [
+            (address.user, [(variant_id, 1) for variant_id in rng.sample(variant_ids, lines)], address)
+            for address in (rng.choice(addresses) for _ in range(options['orders']))
+        ]
+
+    def handle(self, *args, **options):
+        if min(options['orders'], options['threads'], options['lines']) < 1:
+            raise CommandError('--orders, --threads and --lines must be at least 1')
+        baskets = iter(self.baskets(options))
+        lock = threading.Lock()
+        results = {'placed': 0, 'rejected': 0, 'failed': 0}
+        latencies = []
+
+        def work():
+            try:
+                while True:
+                    with lock:
+                        basket = next(baskets, None)
+                    if basket is None:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        place_order(*basket)
+                        result = 'placed'
+                    except ValidationError:
+                        # Out of stock or over a per-customer limit
+                        result = 'rejected'
+                    except DatabaseError:
+                        # e.g. "database is locked" on SQLite
+                        result = 'failed'
+                    with lock:
+                        results[result] += 1
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        # Confirmation emails still run on the deferred queue, but are not sent
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend'):
+            started = time.perf_counter()
+            threads = [threading.Thread(target=work) for _ in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            deferred_queue.join()
+
+        latencies.sort()
+        self.stdout.write(
+            f"{connection.vendor}: {results['placed']} placed, {results['rejected']} rejected, "
+            f"{results['failed']} failed with {options['threads']} threads"
+        )
+        self.stdout.write(
+            f'latency median {statistics.median(latencies) * 1000:.1f}ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{results['placed'] / elapsed if elapsed else 0:.0f} orders/s ({elapsed:.2f}s)"
+        ))
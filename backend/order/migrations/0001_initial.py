@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+import core.utils.weight
+import django.core.validators
+import django.db.models.deletion
+import django_measurement.models
+import measurement.measures.mass
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('account', '0003_alter_customeruser_options_alter_employee_user_and_more'),
+        ('product', '0006_alter_category_background_image_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('customer_email', models.EmailField(blank=True, max_length=254, verbose_name='Customer Email')),
+                ('status', models.CharField(choices=[('unfulfilled', 'Unfulfilled'), ('fulfilled', 'Fulfilled'), ('canceled', 'Canceled')], default='unfulfilled', max_length=32, verbose_name='Status')),
+                ('shipping_address', models.JSONField(verbose_name='Shipping Address')),
+                ('billing_address', models.JSONField(verbose_name='Billing Address')),
+                ('total_price', models.DecimalField(decimal_places=3, default=0, max_digits=12, verbose_name='Total Price')),
+                ('total_weight', django_measurement.models.MeasurementField(default=core.utils.weight.zero_weight, measurement=measurement.measures.mass.Mass)),
+                ('line_count', models.PositiveIntegerField(default=0, verbose_name='Line Count')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='account.customeruser', verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Order',
+                'verbose_name_plural': 'Orders',
+                'ordering': ('-created_at', '-pk'),
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=255, verbose_name='Product Name')),
+                ('variant_name', models.CharField(blank=True, max_length=255, verbose_name='Variant Name')),
+                ('sku', models.CharField(max_length=64, verbose_name='SKU')),
+                ('quantity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantity')),
+                ('unit_price', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Unit Price')),
+                ('total_price', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Total Price')),
+                ('unit_weight', django_measurement.models.MeasurementField(blank=True, measurement=measurement.measures.mass.Mass, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='order.order', verbose_name='Order')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='product.productvariant', verbose_name='Product Variant')),
+            ],
+            options={
+                'verbose_name': 'Order Line',
+                'verbose_name_plural': 'Order Lines',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'created_at'], name='order_order_custome_a09334_idx'),
+        ),
+    ]
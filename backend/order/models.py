@@ -1,3 +1,106 @@
+from uuid import uuid4
+
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from django.core.validators import MinValueValidator
+
+from measurement.measures import Weight
+from django_measurement.models import MeasurementField
+
+from . import OrderStatus
+from core import settings
+from core.units import WeightUnits
+from core.utils.weight import zero_weight
+
+class Order(models.Model):
+    uuid = models.UUIDField(default=uuid4, unique=True, editable=False)
+    customer = models.ForeignKey(
+        'account.CustomerUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='orders',
+        verbose_name=_('Customer')
+    )
+    customer_email = models.EmailField(_('Customer Email'), blank=True)
+    status = models.CharField(
+        _('Status'),
+        max_length=32,
+        choices=OrderStatus.CHOICES,
+        default=OrderStatus.UNFULFILLED
+    )
+
+    # Addresses as they were at checkout, later edits of the address book don't change the order
+    shipping_address = models.JSONField(_('Shipping Address'))
+    billing_address = models.JSONField(_('Billing Address'))
+
+    total_price = models.DecimalField(
+        _('Total Price'),
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES,
+        default=0
+    )
+    total_weight = MeasurementField(
+        measurement=Weight,
+        unit_choices=WeightUnits.CHOICES,
+        default=zero_weight
+    )
+    line_count = models.PositiveIntegerField(_('Line Count'), default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Order {self.uuid}'
+
+    class Meta:
+        ordering = ('-created_at', '-pk')
+        indexes = [models.Index(fields=['customer', 'created_at'])]
+        verbose_name = _('Order')
+        verbose_name_plural = _('Orders')
+
+class OrderLine(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='lines',
+        verbose_name=_('Order')
+    )
+    variant = models.ForeignKey(
+        'product.ProductVariant',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='order_lines',
+        verbose_name=_('Product Variant')
+    )
+
+    # Snapshot of the variant at checkout
+    product_name = models.CharField(_('Product Name'), max_length=255)
+    variant_name = models.CharField(_('Variant Name'), max_length=255, blank=True)
+    sku = models.CharField(_('SKU'), max_length=64)
+
+    quantity = models.PositiveIntegerField(_('Quantity'), validators=[MinValueValidator(1)])
+    unit_price = models.DecimalField(
+        _('Unit Price'),
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES
+    )
+    total_price = models.DecimalField(
+        _('Total Price'),
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES
+    )
+    unit_weight = MeasurementField(
+        measurement=Weight,
+        unit_choices=WeightUnits.CHOICES,
+        null=True,
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        return f'{self.quantity} x {self.sku}'
 
-# Create your models here.
+    class Meta:
+        verbose_name = _('Order Line')
+        verbose_name_plural = _('Order Lines')
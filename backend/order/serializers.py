@@ -0,0 +1,44 @@
+from rest_framework import serializers
+
+from product.serializers import decimal_or_none
+
+
+class OrderSerializer:
+    @staticmethod
+    def to_representation(order, lines):
+        return {
+            'uuid': order.uuid,
+            'status': order.status,
+            'total_price': decimal_or_none(order.total_price),
+            'total_weight': {'value': order.total_weight.g, 'unit': 'g'},
+            'shipping_address': order.shipping_address,
+            'billing_address': order.billing_address,
+            'lines': [
+                {
+                    'variant_id': line.variant_id,
+                    'sku': line.sku,
+                    'product_name': line.product_name,
+                    'variant_name': line.variant_name,
+                    'quantity': line.quantity,
+                    'unit_price': decimal_or_none(line.unit_price),
+                    'total_price': decimal_or_none(line.total_price),
+                }
+                for line in lines
+            ],
+            'created_at': order.created_at,
+        }
+
+
+class CheckoutLineSerializer(serializers.Serializer):
+    # Bounded by the BigAutoField / PositiveIntegerField columns they are compared with
+    variant_id = serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+    quantity = serializers.IntegerField(min_value=1, max_value=2 ** 31 - 1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Request body of a checkout"""
+    max_lines = 500
+
+    lines = CheckoutLineSerializer(many=True, max_length=max_lines)
+    shipping_address = serializers.UUIDField()
+    billing_address = serializers.UUIDField(required=False, allow_null=True)
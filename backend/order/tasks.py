@@ -0,0 +1,28 @@
+"""Side effects of a placed order, run on the deferred queue after commit"""
+from django.core.mail import send_mail
+
+from core import settings
+from inventory.allocation import get_available_quantities, stock_levels_changed
+from order.models import Order
+
+
+def send_order_confirmation(order_id):
+    order = Order.objects.get(pk=order_id)
+    if not order.customer_email:
+        return
+    lines = '\n'.join(
+        f'{line.quantity} x {line.product_name} {line.variant_name} ({line.sku}): {line.total_price}'
+        for line in order.lines.all()
+    )
+    send_mail(
+        subject=f'Your order {order.uuid}',
+        message=f'Thank you for your order.\n\n{lines}\n\nTotal: {order.total_price}',
+        from_email=settings.EMAIL_HOST_USER,
+        recipient_list=[order.customer_email],
+    )
+
+
+def sync_stock_levels(variant_ids):
+    stock_levels_changed.send(
+        sender=Order, variant_ids=variant_ids, quantities=get_available_quantities(variant_ids)
+    )
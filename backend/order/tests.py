@@ -1,3 +1,136 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from account.models import Address, CustomerUser, User
+from inventory.models import Stock, Warehouse
+from order.checkout import place_order
+from order.models import Order
+from product.models import Product, ProductType, ProductVariant
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(email='customer@example.com', username='customer')
+        self.customer = CustomerUser.objects.create(user=user)
+        self.address = Address.objects.create(
+            user=self.customer, address_name='Home', first_name='Ada', last_name='Lovelace', city='London'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse('order:checkout')
+
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.product = Product.objects.create(product_type=product_type, name='Tea', slug='tea')
+        warehouse = Warehouse.objects.create(name='Main')
+        self.variants = []
+        for sku, limit in (('TEA-1', None), ('TEA-2', 2)):
+            variant = ProductVariant.objects.create(
+                product=self.product, sku=sku, selling_price=10, quantity_limit_per_customer=limit
+            )
+            Stock.objects.create(warehouse=warehouse, product_variant=variant, quantity=10)
+            self.variants.append(variant)
+
+    def checkout(self, *lines, **headers):
+        return self.client.post(self.url, {
+            'lines': [{'variant_id': variant_id, 'quantity': quantity} for variant_id, quantity in lines],
+            'shipping_address': str(self.address.uuid),
+        }, format='json', **headers)
+
+    def test_checkout(self):
+        response = self.checkout((self.variants[0].pk, 3), (self.variants[1].pk, 1))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['total_price'], '40.000')
+        self.assertEqual(len(response.data['lines']), 2)
+        self.assertEqual(Stock.objects.get(product_variant=self.variants[0]).quantity_allocated, 3)
+
+    def test_quantity_limit_counts_previous_orders(self):
+        self.assertEqual(self.checkout((self.variants[1].pk, 2)).status_code, 201)
+        response = self.checkout((self.variants[1].pk, 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['code'], 'quantity_limit_exceeded')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_invalid_lines(self):
+        for lines in (
+            [{'variant_id': 'abc', 'quantity': 1}],
+            [{'variant_id': [1], 'quantity': 1}],
+            [{'variant_id': 2 ** 70, 'quantity': 1}],
+            [{'variant_id': self.variants[0].pk, 'quantity': 0}],
+            [{'variant_id': self.variants[0].pk, 'quantity': 1.5}],
+            [{'variant_id': self.variants[0].pk}],
+            ['line'],
+            'lines',
+        ):
+            with self.subTest(lines=lines):
+                response = self.client.post(
+                    self.url, {'lines': lines, 'shipping_address': str(self.address.uuid)}, format='json'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('lines', response.data)
+        response = self.client.post(self.url, {'lines': [], 'shipping_address': 'home'}, format='json')
+        self.assertIn('shipping_address', response.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_too_many_lines(self):
+        response = self.checkout(*[(self.variants[0].pk, 1)] * 501)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lines', response.data)
+
+    def test_inactive_product(self):
+        Product.objects.filter(pk=self.product.pk).update(is_active=False)
+        response = self.checkout((self.variants[0].pk, 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['code'], 'variant_not_found')
+
+    def test_query_count(self):
+        # Addresses, variants; then in the transaction (savepoints included): customer lock,
+        # previous orders, a read and an update per reserved stock, the order and its lines
+        with self.assertNumQueries(14):
+            response = self.checkout((self.variants[0].pk, 1), (self.variants[1].pk, 1))
+        self.assertEqual(response.status_code, 201)
+
+    def test_retry_with_idempotency_key_is_replayed(self):
+        first = self.checkout((self.variants[0].pk, 3), HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertNotIn('Idempotent-Replayed', first)
+        retry = self.checkout((self.variants[0].pk, 3), HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Stock.objects.get(product_variant=self.variants[0]).quantity_allocated, 3)
+
+    def test_rejected_request_is_replayed(self):
+        self.checkout((self.variants[1].pk, 2))
+        first = self.checkout((self.variants[1].pk, 1), HTTP_IDEMPOTENCY_KEY='order-2')
+        retry = self.checkout((self.variants[1].pk, 1), HTTP_IDEMPOTENCY_KEY='order-2')
+        self.assertEqual((first.status_code, retry.status_code), (400, 400))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+
+    def test_retry_while_in_progress_conflicts(self):
+        retries = []
+
+        def place_order_during_retry(*args, **kwargs):
+            retries.append(self.checkout((self.variants[0].pk, 1), HTTP_IDEMPOTENCY_KEY='order-3'))
+            return place_order(*args, **kwargs)
+
+        with mock.patch('order.views.place_order', side_effect=place_order_during_retry):
+            response = self.checkout((self.variants[0].pk, 1), HTTP_IDEMPOTENCY_KEY='order-3')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(retries[0].status_code, 409)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_request(self):
+        self.assertEqual(self.checkout((self.variants[0].pk, 1), HTTP_IDEMPOTENCY_KEY='order-4').status_code, 201)
+        response = self.checkout((self.variants[0].pk, 2), HTTP_IDEMPOTENCY_KEY='order-4')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
 
-# Create your tests here.
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.checkout((self.variants[0].pk, 1))
+        self.checkout((self.variants[0].pk, 1))
+        self.assertEqual(Order.objects.count(), 2)
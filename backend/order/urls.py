@@ -0,0 +1,9 @@
+from django.urls import path
+
+from order import views
+
+app_name = 'order'
+
+urlpatterns = [
+    path('checkout/', views.CheckoutView.as_view(), name='checkout'),
+]
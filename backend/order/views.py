@@ -1,3 +1,55 @@
-from django.shortcuts import render
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from account.models import Address
+from core.idempotency import idempotent
+from order.checkout import place_order
+from order.error_codes import OrderErrorCode
+from order.serializers import CheckoutSerializer, OrderSerializer
+
+
+class CheckoutView(APIView):
+    """
+    Place an order for the current customer.
+    POST {"lines": [{"variant_id", "quantity"}], "shipping_address": <uuid>, "billing_address": <uuid, optional>}
+    Send an Idempotency-Key header to make retries safe.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get_customer(self, request):
+        try:
+            return request.user.customer_profile
+        except ObjectDoesNotExist:
+            raise PermissionDenied('Only customers can place orders.')
+
+    def get_addresses(self, customer, shipping_uuid, billing_uuid):
+        uuids = {shipping_uuid, billing_uuid or shipping_uuid}
+        addresses = {
+            str(uuid): address
+            for uuid, address in Address.objects.filter(user=customer, uuid__in=uuids).snapshots(key='uuid').items()
+        }
+        if uuids - addresses.keys():
+            raise ValidationError({'code': OrderErrorCode.ADDRESS_NOT_FOUND.value, 'detail': 'Unknown address.'})
+        return addresses[shipping_uuid], addresses[billing_uuid or shipping_uuid]
+
+    @idempotent
+    def post(self, request):
+        customer = self.get_customer(request)
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        lines = [(line['variant_id'], line['quantity']) for line in data['lines']]
+        billing_uuid = data.get('billing_address')
+        shipping_address, billing_address = self.get_addresses(
+            customer, str(data['shipping_address']), billing_uuid and str(billing_uuid)
+        )
+
+        try:
+            order = place_order(customer, lines, shipping_address, billing_address)
+        except DjangoValidationError as exc:
+            raise ValidationError({'code': exc.code, 'detail': exc.messages})
+        return Response(OrderSerializer.to_representation(order, order.prefetched_lines), status=status.HTTP_201_CREATED)
@@ -5,4 +5,13 @@ class ProductMediaTypes:
     CHOICES = [
         (IMAGE, "An uploaded image or an URL to an image"),
         (VIDEO, "A URL to an external video"),
-    ]
\ No newline at end of file
+    ]
+
+class TombstoneTypes:
+    PRODUCT = "product"
+    VARIANT = "variant"
+
+    CHOICES = [
+        (PRODUCT, "A deleted product"),
+        (VARIANT, "A deleted product variant"),
+    ]
@@ -37,7 +37,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
 
     list_display = ('uuid', 'name', 'slug')
-    list_filter = ('uuid', 'name__icontains', 'slug')
-    search_fields = ('uuid', 'email', 'username')
+    list_filter = ('is_active', 'product_type', 'category')
+    search_fields = ('uuid', 'name', 'slug')
     readonly_fields = ('uuid',)
     ordering = ('created_at',)
\ No newline at end of file
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from product import TombstoneTypes
+from product.tombstones import TOMBSTONE_OVERLAP, TombstoneWatcher, prune_tombstones
+
+# How often (seconds) a lookup pulls variants changed since the last refresh
+BARCODE_LOOKUP_REFRESH_INTERVAL = 5
+
+
+class BarcodeLookup:
+    """
+    In-memory map from UPC, EAN-13 and SKU to (variant id, selling price).
+
+    It is loaded once and then refreshed incrementally from
+    ProductVariant.updated_at; deleted variants are dropped from their
+    tombstones. Resolving a scan is a dict lookup.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.variant_codes = {}
+        self.loaded = False
+        self.watermark = None
+        self.refreshed_at = 0
+        self.deletions = TombstoneWatcher(TombstoneTypes.VARIANT)
+        self._lock = threading.Lock()
+
+    def _remove(self, variant_id):
+        for code in self.variant_codes.pop(variant_id, ()):
+            if self.codes.get(code, (None,))[0] == variant_id:
+                del self.codes[code]
+
+    def remove(self, variant_id):
+        with self._lock:
+            self._remove(variant_id)
+
+    def refresh(self):
+        from product.models import ProductVariant
+
+        with self._lock:
+            variants = ProductVariant.objects.order_by("updated_at")
+            if self.loaded and self.watermark is not None and not self.deletions.needs_reload():
+                for variant_id in self.deletions.deleted_ids():
+                    self._remove(variant_id)
+                # Rows are stamped before their transaction commits, re-read a window; applying a row twice is harmless
+                variants = variants.filter(updated_at__gte=self.watermark - TOMBSTONE_OVERLAP)
+            else:
+                self.codes = {}
+                self.variant_codes = {}
+                self.watermark = None
+                self.deletions.start()
+                prune_tombstones()
+            rows = variants.values_list("pk", "sku", "upc_code", "ean13_code", "selling_price", "updated_at")
+            for variant_id, sku, upc_code, ean13_code, selling_price, updated_at in rows.iterator(chunk_size=5000):
+                self._remove(variant_id)
+                entry = (variant_id, str(selling_price))
+                codes = tuple(code for code in (upc_code, ean13_code, sku) if code)
+                for code in codes:
+                    self.codes[code] = entry
+                self.variant_codes[variant_id] = codes
+                self.watermark = updated_at
+            self.loaded = True
+            self.refreshed_at = time.monotonic()
+
+    def lookup_many(self, codes):
+        """Return {code: {"variant_id", "selling_price"} or None} for scanned codes"""
+        if not self.loaded or time.monotonic() - self.refreshed_at > BARCODE_LOOKUP_REFRESH_INTERVAL:
+            self.refresh()
+
+        results = {}
+        for code in codes:
+            entry = self.codes.get(code.strip())
+            results[code] = {"variant_id": entry[0], "selling_price": entry[1]} if entry else None
+        return results
+
+
+barcode_lookup = BarcodeLookup()
@@ -0,0 +1,128 @@
+import threading
+from collections import deque, namedtuple
+from typing import List
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from core import settings
+from product.utils import generate_barcodes, get_serial_width
+
+Barcode = namedtuple("Barcode", ["variant_code", "upc_code", "ean13_code"])
+
+
+class BarcodeAllocator:
+    """
+    Hand out unique variant/UPC/EAN-13 codes in blocks.
+
+    Every producer code owns a BarcodeSequence row. A block of serials is
+    reserved with a single locked read and update of that row, so codes never
+    collide and a whole block costs one round-trip instead of one per variant.
+    """
+
+    def __init__(self, country_code=None, producer_codes=None, block_size=None):
+        self.country_code = country_code or settings.BARCODE_COUNTRY_CODE
+        self.producer_codes = list(producer_codes or settings.BARCODE_PRODUCER_CODES)
+        self.block_size = block_size or settings.BARCODE_BLOCK_SIZE
+
+        if not self.producer_codes:
+            raise ImproperlyConfigured("BARCODE_PRODUCER_CODES must not be empty")
+        if len({len(code) for code in self.producer_codes}) != 1:
+            raise ImproperlyConfigured("All BARCODE_PRODUCER_CODES must have the same length")
+        if get_serial_width(self.producer_codes[0], self.country_code) < 1:
+            raise ImproperlyConfigured("Country and producer codes leave no room for a serial")
+
+        self._pool = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Number of serials available for a single producer code"""
+        return 10 ** get_serial_width(self.producer_codes[0], self.country_code)
+
+    def _reserve(self, count):
+        """
+        Reserve up to `count` serials from the first producer code that still
+        has room. Returns (producer_code, range).
+        """
+        BarcodeSequence = apps.get_model("product", "BarcodeSequence")
+
+        with transaction.atomic():
+            for producer_code in self.producer_codes:
+                sequence, _created = BarcodeSequence.objects.select_for_update().get_or_create(
+                    prefix=f"{self.country_code}{producer_code}"
+                )
+                start = sequence.next_value
+                if start >= self.capacity:
+                    continue
+                stop = min(start + count, self.capacity)
+                sequence.next_value = stop
+                sequence.save(update_fields=["next_value"])
+                return producer_code, range(start, stop)
+
+        raise ValueError(_('Barcode space is exhausted, add a producer code to BARCODE_PRODUCER_CODES'))
+
+    def barcode_for(self, variant_code):
+        """
+        Rebuild the barcodes of a variant code this allocator issued, or
+        return None for codes in any other format.
+        """
+        width = get_serial_width(self.producer_codes[0], self.country_code)
+        for producer_code in self.producer_codes:
+            serial = variant_code[len(producer_code):]
+            if variant_code.startswith(producer_code) and len(serial) == width and serial.isdigit():
+                return Barcode(*generate_barcodes(int(serial), producer_code, self.country_code))
+        return None
+
+    def complete(self, variants):
+        """
+        Fill the missing variant code, UPC and EAN-13 of model instances in
+        memory. Variants without a variant code get newly allocated codes.
+        Variants that have one get the barcodes it was issued with. Codes in
+        another format (legacy or imported) cannot be rebuilt, so they get
+        fresh barcodes. Barcodes that are already set are kept.
+        """
+        variants = [variant for variant in variants if not (variant.variant_code and variant.upc_code and variant.ean13_code)]
+        # Unsaved instances are unhashable, keep the rebuilt barcodes in a parallel list
+        rebuilt = [self.barcode_for(variant.variant_code) if variant.variant_code else None for variant in variants]
+        fresh = iter(self.allocate(rebuilt.count(None)))
+        for variant, barcode in zip(variants, rebuilt):
+            barcode = barcode or next(fresh)
+            variant.variant_code = variant.variant_code or barcode.variant_code
+            variant.upc_code = variant.upc_code or barcode.upc_code
+            variant.ean13_code = variant.ean13_code or barcode.ean13_code
+        return variants
+
+    def allocate(self, count: int) -> List[Barcode]:
+        """
+        Return `count` unused barcodes.
+
+        Outside a transaction the rest of a block is kept for the next call.
+        Inside one, only what is asked for is reserved: if the caller rolls
+        back, the sequence rolls back with it and no cached code is reissued.
+        """
+        keep_rest = not transaction.get_connection().in_atomic_block
+        barcodes = []
+
+        with self._lock:
+            while len(barcodes) < count:
+                if not self._pool:
+                    wanted = count - len(barcodes)
+                    if keep_rest:
+                        wanted = max(wanted, self.block_size)
+                    producer_code, serials = self._reserve(wanted)
+                    self._pool.append((producer_code, iter(serials), len(serials)))
+
+                producer_code, serials, left = self._pool.popleft()
+                take = min(left, count - len(barcodes))
+                for _index in range(take):
+                    barcodes.append(Barcode(*generate_barcodes(next(serials), producer_code, self.country_code)))
+                if left > take:
+                    self._pool.appendleft((producer_code, serials, left - take))
+
+        return barcodes
+
+
+barcode_allocator = BarcodeAllocator()
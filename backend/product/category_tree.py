@@ -0,0 +1,200 @@
+from functools import partial
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from core.renditions import rendition_urls
+
+CATEGORY_TREE_CACHE_KEY = "product:category_tree"
+# The tree is stored under the current version, invalidating only writes a new version
+CATEGORY_TREE_VERSION_KEY = "product:category_tree:version"
+# Bounds how long counts can be off if an update is ever lost (seconds)
+CATEGORY_TREE_TIMEOUT = 60 * 60
+CATEGORY_TREE_LOCK_KEY = "product:category_tree:lock"
+CATEGORY_TREE_LOCK_TIMEOUT = 5
+
+
+class CategoryNode:
+    """A category as stored in the cached tree, without any database access"""
+
+    __slots__ = (
+        "id", "parent_id", "name", "slug", "level",
+        "ancestor_ids", "children_ids", "descendant_count",
+        "product_count", "subtree_product_count", "background_image",
+    )
+
+    def __init__(self, id, parent_id, name, slug, level, product_count, background_image=""):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.slug = slug
+        self.level = level
+        self.ancestor_ids = ()
+        self.children_ids = []
+        self.descendant_count = 0
+        # Active products directly in this category / in the whole subtree
+        self.product_count = product_count
+        self.subtree_product_count = product_count
+        self.background_image = background_image
+
+    @property
+    def has_children(self):
+        return bool(self.children_ids)
+
+    def as_data(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "slug": self.slug,
+            "level": self.level,
+            "has_children": self.has_children,
+            "descendant_count": self.descendant_count,
+            "product_count": self.subtree_product_count,
+            "background_image": rendition_urls(self.background_image),
+        }
+
+
+class CategoryTree:
+    """
+    The whole category tree with per-node child flags, descendant counts,
+    ancestor paths and active product counts, built with a single query.
+    """
+
+    def __init__(self, nodes):
+        # nodes must be in tree order (tree_id, lft): parents before children
+        self.version = uuid4().hex
+        self.nodes = {}
+        self.root_ids = []
+
+        for node in nodes:
+            parent = self.nodes.get(node.parent_id)
+            if parent is None:
+                self.root_ids.append(node.id)
+            else:
+                node.ancestor_ids = parent.ancestor_ids + (parent.id,)
+                parent.children_ids.append(node.id)
+            self.nodes[node.id] = node
+
+        for node in reversed(list(self.nodes.values())):
+            parent = self.nodes.get(node.parent_id)
+            if parent is not None:
+                parent.descendant_count += node.descendant_count + 1
+                parent.subtree_product_count += node.subtree_product_count
+
+    @classmethod
+    def build(cls):
+        from product.models import Category
+
+        rows = (
+            Category.objects
+            .annotate(active_products=Count("ct_products", filter=Q(ct_products__is_active=True)))
+            .order_by("tree_id", "lft")
+            .values_list("id", "parent_id", "name", "slug", "level", "active_products", "background_image")
+        )
+        return cls(CategoryNode(*row) for row in rows)
+
+    def __contains__(self, category_id):
+        return category_id in self.nodes
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+    def get_children(self, category_id):
+        return [self.nodes[child_id] for child_id in self.nodes[category_id].children_ids]
+
+    def get_ancestors(self, category_id, include_self=False):
+        node = self.nodes[category_id]
+        ancestors = [self.nodes[ancestor_id] for ancestor_id in node.ancestor_ids]
+        if include_self:
+            ancestors.append(node)
+        return ancestors
+
+    def get_descendant_ids(self, category_id, include_self=True):
+        ids = [category_id] if include_self else []
+        stack = list(self.nodes[category_id].children_ids)
+        while stack:
+            child_id = stack.pop()
+            ids.append(child_id)
+            stack.extend(self.nodes[child_id].children_ids)
+        return ids
+
+    def adjust_product_count(self, category_id, delta):
+        node = self.nodes.get(category_id)
+        if node is None:
+            return False
+        self.version = uuid4().hex
+        node.product_count += delta
+        node.subtree_product_count += delta
+        for ancestor_id in node.ancestor_ids:
+            self.nodes[ancestor_id].subtree_product_count += delta
+        return True
+
+    def as_nested(self, category_ids=None):
+        """Return the navigation tree as nested dicts"""
+        result = []
+        for category_id in self.root_ids if category_ids is None else category_ids:
+            node = self.nodes[category_id]
+            data = node.as_data()
+            data["children"] = self.as_nested(node.children_ids)
+            result.append(data)
+        return result
+
+
+def _tree_key():
+    version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    if version is None:
+        cache.add(CATEGORY_TREE_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(CATEGORY_TREE_VERSION_KEY)
+    return f"{CATEGORY_TREE_CACHE_KEY}:{version}"
+
+
+def get_category_tree():
+    """Return the cached category tree, building it on a cache miss"""
+    key = _tree_key()
+    tree = cache.get(key)
+    if tree is None:
+        tree = CategoryTree.build()
+        cache.set(key, tree, CATEGORY_TREE_TIMEOUT)
+    return tree
+
+
+def _bump_version():
+    # A tree still being built or adjusted is written under the old key and never read again
+    cache.set(CATEGORY_TREE_VERSION_KEY, uuid4().hex, None)
+
+
+def invalidate_category_tree():
+    """Drop the cached tree once the current transaction commits"""
+    transaction.on_commit(_bump_version)
+
+
+def _apply_product_count(category_id, delta):
+    # get/modify/set is not atomic: updates are serialized with a lock, when
+    # it is taken the tree is rebuilt rather than risk losing an update
+    if not cache.add(CATEGORY_TREE_LOCK_KEY, 1, CATEGORY_TREE_LOCK_TIMEOUT):
+        _bump_version()
+        return
+    try:
+        key = _tree_key()
+        tree = cache.get(key)
+        if tree is None:
+            return
+        if tree.adjust_product_count(category_id, delta):
+            cache.set(key, tree, CATEGORY_TREE_TIMEOUT)
+        else:
+            _bump_version()
+    finally:
+        cache.delete(CATEGORY_TREE_LOCK_KEY)
+
+
+def update_category_product_count(category_id, delta):
+    """
+    Apply a change of active products in a category to the cached tree
+    once the current transaction commits. Nothing is done when the tree is
+    not cached, the next read builds it.
+    """
+    if not category_id or not delta:
+        return
+    transaction.on_commit(partial(_apply_product_count, category_id, delta))
@@ -0,0 +1,211 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from product.category_tree import get_category_tree
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bucket edges of the price and weight (grams) facets, the last bucket is open
+FACET_PRICE_EDGES = (0, 25, 50, 100, 250, 500, 1000)
+FACET_WEIGHT_EDGES = (0, 250, 500, 1000, 5000, 20000)
+
+# A stale index is rebuilt on the next request, at most this often (seconds)
+FACET_INDEX_MIN_REBUILD_INTERVAL = 30
+# Changed on every catalog change, in the shared cache so every process sees it
+FACET_INDEX_VERSION_KEY = "product:facet_index:version"
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_microseconds(value):
+    """An aware datetime as integer microseconds since the epoch, naive ones are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def bucket_labels(edges):
+    labels = [f"{low}-{high}" for low, high in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]}+")
+    return labels
+
+
+class FacetIndex:
+    """
+    Column arrays over all active products, in listing order (newest first):
+    category, product type, lowest selling price and weight in grams.
+
+    A filter is a boolean mask per condition, and every facet is counted with
+    one bincount over the rows matching the other conditions, so a listing
+    page and all its facet counts cost a pass over a few arrays and no COUNT
+    query. Needs NumPy.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.product_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        # Microseconds since the epoch, (created_at, id) is the pagination key
+        self.created_at = np.array([to_microseconds(row[5]) for row in rows], dtype=np.int64)
+
+        category_ids = sorted({row[1] for row in rows if row[1] is not None})
+        self.category_ids = np.array(category_ids, dtype=np.int64)
+        category_codes = {category_id: code for code, category_id in enumerate(category_ids)}
+        self.categories = np.array([category_codes.get(row[1], -1) for row in rows], dtype=np.int32)
+
+        type_ids = sorted({row[2] for row in rows})
+        self.type_ids = np.array(type_ids, dtype=np.int64)
+        type_codes = {type_id: code for code, type_id in enumerate(type_ids)}
+        self.types = np.array([type_codes[row[2]] for row in rows], dtype=np.int32)
+
+        self.prices = np.array([float(row[3]) if row[3] is not None else np.nan for row in rows])
+        self.weights = np.array([row[4] if row[4] is not None else np.nan for row in rows], dtype=np.float64)
+
+    @classmethod
+    def build(cls):
+        from product.models import Product
+
+        rows = (
+            Product.objects.filter(is_active=True)
+            # MeasurementField stores grams, read them as a plain float
+            .annotate(weight_grams=ExpressionWrapper(F("weight"), output_field=FloatField()))
+            .order_by("-created_at", "-pk")
+            .values_list("pk", "category_id", "product_type_id", "min_selling_price", "weight_grams", "created_at")
+        )
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def _codes_mask(self, column, ids, all_ids):
+        codes = np.flatnonzero(np.isin(all_ids, list(ids)))
+        return np.isin(column, codes)
+
+    def _range_mask(self, column, low, high):
+        mask = np.ones(len(column), dtype=bool)
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column <= high
+        return mask
+
+    def _bucket_counts(self, column, mask, edges):
+        values = column[mask]
+        values = values[~np.isnan(values)]
+        buckets = np.digitize(values, edges) - 1
+        counts = np.bincount(buckets[buckets >= 0], minlength=len(edges))
+        return dict(zip(bucket_labels(edges), counts.tolist()))
+
+    def search(self, category=None, product_types=None, price_min=None, price_max=None,
+               weight_min=None, weight_max=None, after=None, limit=50):
+        """
+        Returns (page product ids, total matches, facets, key of the last
+        row or None). `category` matches its whole subtree, `after` is the
+        (created_at, id) key of the last row of the previous page; it stays
+        valid when that product is gone.
+        """
+        everything = np.ones(len(self), dtype=bool)
+        masks = {
+            "category": everything,
+            "product_type": everything,
+            "price": self._range_mask(self.prices, price_min, price_max),
+            "weight": self._range_mask(self.weights, weight_min, weight_max),
+        }
+        tree = get_category_tree()
+        if category is not None:
+            category_ids = tree.get_descendant_ids(category) if category in tree else []
+            masks["category"] = self._codes_mask(self.categories, category_ids, self.category_ids)
+        if product_types:
+            masks["product_type"] = self._codes_mask(self.types, product_types, self.type_ids)
+
+        def without(name):
+            mask = everything.copy()
+            for other, other_mask in masks.items():
+                if other != name:
+                    mask &= other_mask
+            return mask
+
+        matches = without(None)
+        page_matches = matches
+        if after is not None:
+            created_at, product_id = to_microseconds(after[0]), after[1]
+            page_matches = matches & (
+                (self.created_at < created_at) | ((self.created_at == created_at) & (self.product_ids < product_id))
+            )
+        positions = np.flatnonzero(page_matches)[:limit]
+        page = self.product_ids[positions].tolist()
+        last_key = None
+        if len(positions) == limit:
+            last_key = (EPOCH + timedelta(microseconds=int(self.created_at[positions[-1]])), page[-1])
+
+        # Category counts include every product of the subtree
+        category_mask = without("category")
+        direct = np.bincount(self.categories[category_mask & (self.categories >= 0)], minlength=len(self.category_ids))
+        direct_counts = dict(zip(self.category_ids.tolist(), direct.tolist()))
+        category_counts = {}
+        for node in tree.nodes.values():
+            count = direct_counts.get(node.id, 0)
+            if count:
+                for category_id in node.ancestor_ids + (node.id,):
+                    category_counts[category_id] = category_counts.get(category_id, 0) + count
+
+        type_counts = np.bincount(self.types[without("product_type")], minlength=len(self.type_ids))
+        facets = {
+            "category": category_counts,
+            "product_type": {
+                type_id: count for type_id, count in zip(self.type_ids.tolist(), type_counts.tolist()) if count
+            },
+            "price": self._bucket_counts(self.prices, without("price"), FACET_PRICE_EDGES),
+            "weight": self._bucket_counts(self.weights, without("weight"), FACET_WEIGHT_EDGES),
+        }
+        return page, int(matches.sum()), facets, last_key
+
+
+_facet_index = None
+_facet_index_version = None
+_facet_index_checked_at = 0
+_facet_index_lock = threading.Lock()
+
+
+def _shared_version():
+    version = cache.get(FACET_INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(FACET_INDEX_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(FACET_INDEX_VERSION_KEY)
+    return version
+
+
+def get_facet_index():
+    """
+    The process' index, rebuilt when the shared version changed. The version
+    is looked up at most every FACET_INDEX_MIN_REBUILD_INTERVAL seconds.
+    """
+    global _facet_index, _facet_index_version, _facet_index_checked_at
+    if _facet_index is not None and time.monotonic() - _facet_index_checked_at < FACET_INDEX_MIN_REBUILD_INTERVAL:
+        return _facet_index
+    with _facet_index_lock:
+        # Read before building: a change committed during the build triggers the next one
+        version = _shared_version()
+        if _facet_index is None or version != _facet_index_version:
+            _facet_index = FacetIndex.build()
+            _facet_index_version = version
+        _facet_index_checked_at = time.monotonic()
+    return _facet_index
+
+
+def _bump_version():
+    cache.set(FACET_INDEX_VERSION_KEY, uuid4().hex, None)
+
+
+def invalidate_facet_index():
+    """Mark every process' index stale once the current transaction commits"""
+    transaction.on_commit(_bump_version)
@@ -0,0 +1,49 @@
+import django_filters
+from measurement.measures import Weight
+
+from product.category_tree import get_category_tree
+from product.models import Product
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class ProductFacetFilterSet(django_filters.FilterSet):
+    """
+    Listing filters. `qs` applies them with the ORM; `facet_params()` hands
+    the same cleaned values to the facet index.
+    """
+    category = django_filters.NumberFilter(method='filter_category')
+    product_type = NumberInFilter(field_name='product_type_id', lookup_expr='in')
+    price_min = django_filters.NumberFilter(field_name='min_selling_price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='min_selling_price', lookup_expr='lte')
+    weight_min = django_filters.NumberFilter(method='filter_weight_min')
+    weight_max = django_filters.NumberFilter(method='filter_weight_max')
+
+    class Meta:
+        model = Product
+        fields = ()
+
+    def filter_category(self, queryset, name, value):
+        tree = get_category_tree()
+        if int(value) not in tree:
+            return queryset.none()
+        return queryset.filter(category_id__in=tree.get_descendant_ids(int(value)))
+
+    def filter_weight_min(self, queryset, name, value):
+        return queryset.filter(weight__gte=Weight(g=value))
+
+    def filter_weight_max(self, queryset, name, value):
+        return queryset.filter(weight__lte=Weight(g=value))
+
+    def facet_params(self):
+        data = self.form.cleaned_data
+        params = {
+            'category': int(data['category']) if data.get('category') is not None else None,
+            'product_types': [int(value) for value in data.get('product_type') or ()],
+        }
+        for name in ('price_min', 'price_max', 'weight_min', 'weight_max'):
+            value = data.get(name)
+            params[name] = float(value) if value is not None else None
+        return params
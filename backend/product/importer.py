@@ -0,0 +1,321 @@
+"""
+Streaming import of supplier feeds into the catalog.
+
+Every CSV column / NDJSON key describes one variant; product fields are
+repeated on each variant of the product:
+
+    product_slug, product_name, product_type, product_type_name, category,
+    category_name, description, weight (grams), is_active,
+    sku, variant_name, selling_price, cost_price, upc_code, ean13_code,
+    quantity_limit_per_customer
+
+Rows are read lazily and written in batches, each in its own transaction,
+so memory does not grow with the size of the file.
+"""
+import csv
+import gzip
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from measurement.measures import Weight
+
+from product.category_tree import invalidate_category_tree
+from product.facets import invalidate_facet_index
+from product.models import Category, Product, ProductType, ProductVariant
+from product.prices import schedule_price_summary_update
+from product.search import schedule_search_update
+from product.validators import validate_upc
+
+# Upserts skip auto_now, updated_at is set explicitly so watermark readers see the change
+PRODUCT_UPDATE_FIELDS = ["name", "description", "product_type", "category", "weight", "is_active", "updated_at"]
+VARIANT_UPDATE_FIELDS = [
+    "product", "name", "selling_price", "cost_price", "upc_code", "ean13_code", "quantity_limit_per_customer",
+    "updated_at",
+]
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+# Column lengths of the values written as is; SQLite ignores them, PostgreSQL fails the batch
+MAX_LENGTHS = {
+    "product_slug": 255, "product_name": 255, "product_type": 128, "category": 255, "sku": 64, "variant_name": 255,
+}
+
+
+def open_feed(path):
+    """Open a plain or gzip'd text file, gzip is detected from its magic bytes"""
+    raw = open(path, "rb")
+    if raw.peek(2)[:2] == b"\x1f\x8b":
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_rows(path, fmt):
+    """Yield (line number, row dict), rows that can't be parsed are yielded as exceptions"""
+    with open_feed(path) as feed:
+        if fmt == "ndjson":
+            for line_number, line in enumerate(feed, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    row = exc
+                yield line_number, row if isinstance(row, (dict, Exception)) else ValueError("Not an object")
+        else:
+            reader = csv.DictReader(feed)
+            for row in reader:
+                yield reader.line_num, row
+
+
+class RowError(Exception):
+    pass
+
+
+def _text(row, key):
+    value = row.get(key)
+    return str(value).strip() if value is not None else ""
+
+
+def _decimal(row, key, required=False):
+    value = _text(row, key)
+    if not value:
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"{key} is not a number: {value}")
+    if value < 0 or not value.is_finite():
+        raise RowError(f"{key} must be a positive number")
+    return value
+
+
+def clean_row(row):
+    """Validate a raw row and return normalized values, or raise RowError"""
+    if isinstance(row, Exception):
+        raise RowError(f"Unreadable row: {row}")
+    values = {}
+    for key in ("product_slug", "product_type", "sku"):
+        values[key] = _text(row, key)
+        if not values[key]:
+            raise RowError(f"{key} is required")
+    values["product_name"] = _text(row, "product_name") or values["product_slug"]
+    values["product_type_name"] = _text(row, "product_type_name") or values["product_type"]
+    values["category"] = _text(row, "category")
+    values["category_name"] = _text(row, "category_name") or values["category"]
+    values["description"] = _text(row, "description") or None
+    values["variant_name"] = _text(row, "variant_name")
+    for key, max_length in MAX_LENGTHS.items():
+        if len(values[key]) > max_length:
+            raise RowError(f"{key} is longer than {max_length} characters")
+    is_active = _text(row, "is_active")
+    values["is_active"] = is_active.lower() in TRUE_VALUES if is_active else True
+
+    values["selling_price"] = _decimal(row, "selling_price", required=True)
+    values["cost_price"] = _decimal(row, "cost_price")
+    values["weight"] = _decimal(row, "weight")
+    limit = _text(row, "quantity_limit_per_customer")
+    if limit and (not limit.isdigit() or int(limit) < 1):
+        raise RowError(f"quantity_limit_per_customer must be a positive integer: {limit}")
+    values["quantity_limit_per_customer"] = int(limit) if limit else None
+
+    values["upc_code"] = _text(row, "upc_code") or None
+    if values["upc_code"]:
+        try:
+            validate_upc(values["upc_code"])
+        except ValidationError as exc:
+            raise RowError(" ".join(exc.messages))
+    values["ean13_code"] = _text(row, "ean13_code") or None
+    if values["ean13_code"] and (len(values["ean13_code"]) != 13 or not values["ean13_code"].isdigit()):
+        raise RowError("EAN-13 must be 13 digits long.")
+    return values
+
+
+class ProductImporter:
+    """
+    Upsert products by slug and variants by SKU from an iterable of
+    (line number, row) pairs. Product types and categories are resolved by
+    slug with one query per batch for the slugs not seen yet, and created
+    when missing.
+    """
+
+    def __init__(self, batch_size=1000, rejected=None, progress=None):
+        self.batch_size = batch_size
+        # Called with (line number, error, row) for every row that is skipped
+        self.rejected = rejected
+        self.progress = progress
+        self.product_type_ids = {}
+        self.category_ids = {}
+        self.stats = {"read": 0, "imported": 0, "rejected": 0, "products": 0}
+        self.started = None
+
+    def reject(self, line_number, error, row):
+        self.stats["rejected"] += 1
+        if self.rejected is not None:
+            self.rejected(line_number, error, row)
+
+    # Lookups
+    def resolve_product_types(self, rows):
+        names = {values["product_type"]: values["product_type_name"] for values in rows}
+        missing = names.keys() - self.product_type_ids.keys()
+        if not missing:
+            return
+        self.product_type_ids.update(ProductType.objects.filter(slug__in=missing).values_list("slug", "pk"))
+        to_create = [slug for slug in missing if slug not in self.product_type_ids]
+        if to_create:
+            ProductType.objects.bulk_create(
+                [ProductType(slug=slug, name=names[slug][:64]) for slug in to_create], ignore_conflicts=True
+            )
+            self.product_type_ids.update(ProductType.objects.filter(slug__in=to_create).values_list("slug", "pk"))
+
+    def resolve_categories(self, rows):
+        names = {values["category"]: values["category_name"] for values in rows if values["category"]}
+        missing = names.keys() - self.category_ids.keys()
+        if not missing:
+            return
+        self.category_ids.update(Category.objects.filter(slug__in=missing).values_list("slug", "pk"))
+        for slug in missing - self.category_ids.keys():
+            # New categories are created as roots; MPTT needs save() for the tree fields
+            self.category_ids[slug] = Category.objects.create(slug=slug, name=names[slug][:250]).pk
+
+    # Batches
+    def import_batch(self, batch):
+        rows = []
+        for line_number, row in batch:
+            try:
+                rows.append((line_number, row, clean_row(row)))
+            except RowError as exc:
+                self.reject(line_number, str(exc), row)
+        if not rows:
+            return
+
+        # Codes that already belong to another SKU would fail the whole insert
+        upcs = {values["upc_code"] for _, _, values in rows if values["upc_code"]}
+        eans = {values["ean13_code"] for _, _, values in rows if values["ean13_code"]}
+        taken = {}
+        if upcs or eans:
+            for sku, upc_code, ean13_code in ProductVariant.objects.filter(
+                Q(upc_code__in=upcs) | Q(ean13_code__in=eans)
+            ).values_list("sku", "upc_code", "ean13_code"):
+                taken[upc_code] = taken[ean13_code] = sku
+
+        accepted, seen_skus, seen_codes = [], set(), set()
+        for line_number, row, values in rows:
+            codes = {code for code in (values["upc_code"], values["ean13_code"]) if code}
+            owner = next((taken[code] for code in codes if taken.get(code, values["sku"]) != values["sku"]), None)
+            if owner is not None:
+                self.reject(line_number, f"Barcode already used by SKU {owner}", row)
+            elif values["sku"] in seen_skus:
+                self.reject(line_number, f"Duplicate SKU {values['sku']} in the same batch", row)
+            elif codes & seen_codes:
+                self.reject(line_number, "Duplicate barcode in the same batch", row)
+            else:
+                seen_skus.add(values["sku"])
+                seen_codes |= codes
+                accepted.append((line_number, row, values))
+        if not accepted:
+            return
+
+        # Types and categories created by a rolled back batch don't exist, forget them
+        product_type_ids, category_ids = dict(self.product_type_ids), dict(self.category_ids)
+        try:
+            with transaction.atomic():
+                products = self.write_batch([values for _, _, values in accepted])
+        except DatabaseError as exc:
+            self.product_type_ids, self.category_ids = product_type_ids, category_ids
+            for line_number, row, _values in accepted:
+                self.reject(line_number, f"Batch failed: {exc}", row)
+            return
+        self.stats["imported"] += len(accepted)
+        self.stats["products"] += products
+
+    def write_batch(self, rows):
+        """Upsert the products and variants of a batch, returns the number of products"""
+        self.resolve_product_types(rows)
+        self.resolve_categories(rows)
+
+        now = timezone.now()
+        # The last row of a product wins, instances are only built once per slug
+        product_rows = {values["product_slug"]: values for values in rows}
+        products = [
+            Product(
+                slug=slug,
+                name=values["product_name"],
+                description=values["description"],
+                product_type_id=self.product_type_ids[values["product_type"]],
+                category_id=self.category_ids.get(values["category"]),
+                weight=Weight(g=values["weight"]) if values["weight"] is not None else None,
+                is_active=values["is_active"],
+                updated_at=now,
+            )
+            for slug, values in product_rows.items()
+        ]
+        Product.objects.bulk_create(
+            products, update_conflicts=True, unique_fields=["slug"], update_fields=PRODUCT_UPDATE_FIELDS
+        )
+        # Not every backend returns primary keys from an upsert
+        product_ids = dict(Product.objects.filter(slug__in=product_rows).values_list("slug", "pk"))
+
+        existing = {
+            sku: (product_id, variant_code, upc_code, ean13_code)
+            for sku, product_id, variant_code, upc_code, ean13_code in ProductVariant.objects.filter(
+                sku__in=[values["sku"] for values in rows]
+            ).values_list("sku", "product_id", "variant_code", "upc_code", "ean13_code")
+        }
+        variants = []
+        for values in rows:
+            _product_id, variant_code, upc_code, ean13_code = existing.get(values["sku"], (None, None, None, None))
+            variants.append(ProductVariant(
+                product_id=product_ids[values["product_slug"]],
+                sku=values["sku"],
+                name=values["variant_name"],
+                variant_code=variant_code,
+                upc_code=values["upc_code"] or upc_code,
+                ean13_code=values["ean13_code"] or ean13_code,
+                selling_price=values["selling_price"],
+                cost_price=values["cost_price"],
+                quantity_limit_per_customer=values["quantity_limit_per_customer"],
+                updated_at=now,
+            ))
+        # Only new SKUs get codes allocated, existing ones keep theirs
+        ProductVariant.objects.fill_codes(variants)
+        ProductVariant.objects.bulk_create(
+            variants, update_conflicts=True, unique_fields=["sku"], update_fields=VARIANT_UPDATE_FIELDS
+        )
+
+        # Bulk writes send no signals
+        # A variant moved to another product changes the summary of both
+        changed = set(product_ids.values()) | {product_id for product_id, *_codes in existing.values()}
+        schedule_price_summary_update(changed)
+        schedule_search_update(changed)
+        invalidate_category_tree()
+        invalidate_facet_index()
+        return len(products)
+
+    def run(self, rows):
+        self.started = time.perf_counter()
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.stats["read"] += len(batch)
+            self.import_batch(batch)
+            if self.progress is not None:
+                self.progress(self.report())
+        return self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        return dict(self.stats, elapsed=elapsed, rows_per_second=self.stats["read"] / elapsed if elapsed else 0)
@@ -0,0 +1,43 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.barcode_lookup import BarcodeLookup
+
+
+class Command(BaseCommand):
+    help = 'Measure loading the barcode lookup and resolving batches of scanned codes from it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batches', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=500, help='Codes per scan request')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options['batches'], options['batch_size']) < 1:
+            raise CommandError('--batches and --batch-size must be at least 1')
+        lookup = BarcodeLookup()
+        started = time.perf_counter()
+        lookup.refresh()
+        load_time = time.perf_counter() - started
+        codes = list(lookup.codes)
+        if not codes:
+            raise CommandError('No variants to look up')
+        self.stdout.write(f'Loaded {len(codes)} codes of {len(lookup.variant_codes)} variants in {load_time:.2f}s')
+
+        rng = random.Random(options['seed'])
+        batches = [rng.choices(codes, k=options['batch_size']) for _ in range(options['batches'])]
+        timings = []
+        for batch in batches:
+            started = time.perf_counter()
+            lookup.lookup_many(batch)
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        per_code = sum(timings) / (len(timings) * options['batch_size'])
+        self.stdout.write(
+            f"batch of {options['batch_size']}: median {timings[len(timings) // 2] * 1000:.2f}ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f}ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f'{per_code * 1e6:.2f}µs per code'))
@@ -0,0 +1,100 @@
+import statistics
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers, viewsets
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+
+from product.models import Product
+from product.views import ProductListView
+
+
+class NaiveProductSerializer(serializers.ModelSerializer):
+    category = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    product_type = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    default_variant = serializers.SlugRelatedField(slug_field='sku', read_only=True)
+
+    class Meta:
+        model = Product
+        fields = (
+            'id', 'uuid', 'name', 'slug', 'rating', 'category', 'product_type', 'default_variant',
+            'min_selling_price', 'max_selling_price', 'variant_count', 'created_at', 'updated_at',
+        )
+
+
+class NaiveProductViewSet(viewsets.ReadOnlyModelViewSet):
+    """The textbook endpoint: ModelSerializer and LIMIT/OFFSET pagination"""
+    permission_classes = (AllowAny,)
+    serializer_class = NaiveProductSerializer
+    pagination_class = LimitOffsetPagination
+    queryset = (
+        Product.objects.filter(is_active=True)
+        .select_related('category', 'product_type', 'default_variant')
+        .order_by('-created_at', '-pk')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare page latency of the keyset paginated product list with a ModelViewSet using OFFSET '
+        'pagination, at increasing page depths. Requests run in-process, responses are rendered to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--depths', default='1,10,100,1000,10000', help='Comma separated page numbers')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per measured page')
+
+    def request(self, params):
+        # Absolute next links need a host the settings allow, the test runner adds its own to django.conf
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        return APIRequestFactory().get('/api/catalog/products/', params, HTTP_HOST=host)
+
+    def timed(self, view, params):
+        request = self.request(params)
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise CommandError(f'{params}: HTTP {response.status_code}')
+        return statistics.median(timings), response
+
+    def handle(self, *args, **options):
+        page_size, self.repeat = options['page_size'], max(1, options['repeat'])
+        try:
+            depths = sorted({int(depth) for depth in options['depths'].split(',')})
+        except ValueError:
+            raise CommandError('--depths must be comma separated integers')
+        products = Product.objects.filter(is_active=True).count()
+        depths = [depth for depth in depths if 1 <= depth and (depth - 1) * page_size < products]
+        if not depths:
+            raise CommandError(f'Not enough active products ({products}) for the requested depths')
+        self.stdout.write(f'{products} active products, {page_size} per page')
+
+        keyset_view = ProductListView.as_view()
+        offset_view = NaiveProductViewSet.as_view({'get': 'list'})
+        # Keyset pages can only be reached by following cursors, walk them and time the requested depths
+        keyset_times = {}
+        cursor = None
+        for page in range(1, depths[-1] + 1):
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            if page in depths:
+                keyset_times[page], response = self.timed(keyset_view, params)
+            else:
+                response = keyset_view(self.request(params))
+            cursor = response.data['next'] and parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+
+        self.stdout.write(f'{"page":>8} {"keyset ms":>10} {"offset ms":>10}')
+        for depth in depths:
+            offset_time, _response = self.timed(offset_view, {'limit': page_size, 'offset': (depth - 1) * page_size})
+            self.stdout.write(f'{depth:>8} {keyset_times[depth] * 1000:>10.2f} {offset_time * 1000:>10.2f}')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,49 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.importer import ProductImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import products and variants from a (gzip\'d) CSV or NDJSON supplier feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the feed, may be gzip compressed')
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rejected', help='Write rejected rows with the reason to this CSV file')
+
+    def write_progress(self, report):
+        self.stdout.write(
+            f"{report['read']} rows read, {report['imported']} imported, {report['rejected']} rejected "
+            f"({report['rows_per_second']:.0f} rows/s)"
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        rejected_file = open(options['rejected'], 'w', newline='', encoding='utf-8') if options['rejected'] else None
+        rejected = None
+        if rejected_file is not None:
+            writer = csv.writer(rejected_file)
+            writer.writerow(('line', 'error', 'row'))
+
+            def rejected(line_number, error, row):
+                writer.writerow((line_number, error, json.dumps(row, default=str) if isinstance(row, dict) else ''))
+
+        importer = ProductImporter(batch_size=options['batch_size'], rejected=rejected, progress=self.write_progress)
+        try:
+            report = importer.run(read_rows(path, fmt))
+        except (OSError, csv.Error, UnicodeDecodeError) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+        finally:
+            if rejected_file is not None:
+                rejected_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} of {report['read']} rows ({report['rejected']} rejected) "
+            f"in {report['elapsed']:.2f}s, {report['rows_per_second']:.0f} rows/s"
+        ))
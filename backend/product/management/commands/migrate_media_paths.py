@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Now
+
+from core.storage import hashed_name_digest
+from product.category_tree import invalidate_category_tree
+from product.models import Category, Product, ProductMedia
+
+FIELDS = ((ProductMedia, 'image'), (Category, 'background_image'))
+
+
+class Command(BaseCommand):
+    help = 'Move product media and category images stored under their old names to content-addressed paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--delete-old', action='store_true', help='Delete old files no row refers to anymore')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def touch(self, model, pks):
+        """
+        bulk_update skips auto_now and sends no signals, so the rows whose
+        payloads carry the image names are marked as changed here
+        """
+        if model is Category:
+            Category.objects.filter(pk__in=pks).update(updated_at=Now())
+        elif model is ProductMedia:
+            Product.objects.filter(media__pk__in=pks).update(updated_at=Now())
+
+    def migrate_field(self, model, field_name, options):
+        storage = model._meta.get_field(field_name).storage
+        rows = (
+            model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            .order_by('pk').values_list('pk', field_name)
+        )
+        moved, missing, old_names, batch = 0, 0, set(), []
+
+        def flush():
+            if batch and not options['dry_run']:
+                model.objects.bulk_update(batch, [field_name])
+                self.touch(model, [instance.pk for instance in batch])
+            batch.clear()
+
+        for pk, name in rows.iterator(chunk_size=options['batch_size']):
+            if hashed_name_digest(name) is not None:
+                continue
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f'{model.__name__} {pk}: {name} does not exist')
+                continue
+            if options['dry_run']:
+                moved += 1
+                continue
+            # Identical files end up with the same name and are only written once
+            with storage.open(name) as file:
+                new_name = storage.save(name, file)
+            batch.append(model(pk=pk, **{field_name: new_name}))
+            old_names.add(name)
+            moved += 1
+            if len(batch) >= options['batch_size']:
+                flush()
+        flush()
+
+        deleted = 0
+        if options['delete_old'] and not options['dry_run']:
+            still_used = set(model.objects.filter(**{f'{field_name}__in': old_names}).values_list(field_name, flat=True))
+            for name in old_names - still_used:
+                storage.delete(name)
+                deleted += 1
+        return moved, missing, deleted
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        for model, field_name in FIELDS:
+            moved, missing, deleted = self.migrate_field(model, field_name, options)
+            self.stdout.write(f'{model.__name__}.{field_name}: {moved} moved, {missing} missing, {deleted} old files deleted')
+            if model is Category and moved and not options['dry_run']:
+                # The cached tree holds the old background image names
+                invalidate_category_tree()
+        self.stdout.write(self.style.SUCCESS(f'Media paths migrated in {time.perf_counter() - started:.2f}s'))
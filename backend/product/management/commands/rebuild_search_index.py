@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product.models import Product
+from product.search import search_index, update_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of all products, e.g. after bulk imports that skip signals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+        total = 0
+        last_pk = 0
+        while True:
+            product_ids = list(
+                Product.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not product_ids:
+                break
+            update_search_documents(product_ids)
+            total += len(product_ids)
+            last_pk = product_ids[-1]
+            self.stdout.write(f'{total} products indexed')
+
+        search_index.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt for {total} products in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,86 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import settings
+from core.renditions import content_hash, original_path, render, rendition_name
+from product.models import Category, ProductMedia
+
+# Render jobs submitted per worker process before waiting for results
+IN_FLIGHT_PER_WORKER = 4
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails of product media and category background images in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', action='append', choices=sorted(settings.THUMBNAIL_SIZES),
+                            help='Only these sizes (repeatable), defaults to all')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+
+    def image_names(self):
+        # order_by() drops Meta.ordering, whose columns would make DISTINCT a no-op
+        yield from ProductMedia.objects.exclude(image='').exclude(image__isnull=True).order_by().values_list(
+            'image', flat=True
+        ).distinct().iterator(chunk_size=2000)
+        yield from Category.objects.exclude(background_image='').exclude(background_image__isnull=True).order_by(
+        ).values_list('background_image', flat=True).distinct().iterator(chunk_size=2000)
+
+    def jobs(self, sizes):
+        """Yield render() arguments for every rendition missing on disk"""
+        for name in self.image_names():
+            try:
+                digest = content_hash(name)
+            except OSError as exc:
+                self.stderr.write(f'{name}: {exc}')
+                continue
+            for size in sizes:
+                target = os.path.join(settings.MEDIA_ROOT, rendition_name(digest, size))
+                if not os.path.exists(target):
+                    yield (
+                        original_path(name), target, settings.THUMBNAIL_SIZES[size],
+                        settings.THUMBNAIL_FORMAT, settings.THUMBNAIL_QUALITY,
+                    )
+
+    def handle(self, *args, **options):
+        sizes = options['size'] or list(settings.THUMBNAIL_SIZES)
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        started = time.perf_counter()
+        done = failed = 0
+
+        jobs = self.jobs(sizes)
+        seen = set()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            # A few jobs per worker in flight, the catalog is never queued at once
+            pending = {}
+            while True:
+                for job in jobs:
+                    # The same file can back several rows of both models, render each target once
+                    if job[1] in seen:
+                        continue
+                    seen.add(job[1])
+                    pending[pool.submit(render, *job)] = job[0]
+                    if len(pending) >= options['workers'] * IN_FLIGHT_PER_WORKER:
+                        break
+                if not pending:
+                    break
+                finished, _running = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    source = pending.pop(future)
+                    try:
+                        future.result()
+                        done += 1
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f'{source}: {exc}')
+                    if (done + failed) % 500 == 0:
+                        self.stdout.write(f'{done + failed} thumbnails')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} thumbnails generated, {failed} failed in {elapsed:.2f}s '
+            f'({done / elapsed if elapsed else 0:.0f}/s)'
+        ))
@@ -0,0 +1,148 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+import core.utils.image_path
+import django.core.validators
+import django.db.models.deletion
+import django_measurement.models
+import measurement.measures.mass
+import product.validators
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarcodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=12, unique=True)),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Barcode Sequence',
+                'verbose_name_plural': 'Barcode Sequences',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=128, unique=True)),
+                ('has_variant', models.BooleanField(default=True)),
+                ('is_shipping_required', models.BooleanField(default=True)),
+                ('is_digital', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Product Type',
+                'verbose_name_plural': 'Product Types',
+                'ordering': ('slug',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=250)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=255, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('background_image', models.ImageField(blank=True, null=True, upload_to=core.utils.image_path.upload_category_background_image)),
+                ('background_image_alt', models.CharField(blank=True, max_length=128)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('lft', models.PositiveIntegerField(editable=False)),
+                ('rght', models.PositiveIntegerField(editable=False)),
+                ('tree_id', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('level', models.PositiveIntegerField(editable=False)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='product.category')),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=255, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('weight', django_measurement.models.MeasurementField(blank=True, measurement=measurement.measures.mass.Mass, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ct_products', to='product.category')),
+                ('product_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pt_products', to='product.producttype')),
+            ],
+            options={
+                'verbose_name': 'Product',
+                'verbose_name_plural': 'Products',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort_order', models.IntegerField(null=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to=core.utils.image_path.upload_product_media)),
+                ('alt', models.CharField(blank=True, max_length=255)),
+                ('media_type', models.CharField(choices=[('IMAGE', 'An uploaded image or an URL to an image'), ('VIDEO', 'A URL to an external video')], default='IMAGE', max_length=32)),
+                ('external_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media', to='product.product')),
+            ],
+            options={
+                'verbose_name': 'Product Media',
+                'verbose_name_plural': 'Product Media',
+                'ordering': ('sort_order', 'pk'),
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=64, unique=True)),
+                ('variant_code', models.CharField(blank=True, max_length=12, null=True, unique=True)),
+                ('upc_code', models.CharField(blank=True, max_length=12, null=True, unique=True, validators=[product.validators.validate_upc])),
+                ('ean13_code', models.CharField(blank=True, max_length=13, null=True, unique=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('weight', django_measurement.models.MeasurementField(blank=True, measurement=measurement.measures.mass.Mass, null=True)),
+                ('quantity_limit_per_customer', models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)])),
+                ('cost_price', models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('selling_price', models.DecimalField(decimal_places=3, max_digits=12, validators=[django.core.validators.MinValueValidator(0)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='product.product')),
+            ],
+            options={
+                'verbose_name': 'Product Variant',
+                'verbose_name_plural': 'Product Variants',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='default_variant',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='product.productvariant'),
+        ),
+        migrations.CreateModel(
+            name='VariantMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='m_variant_media', to='product.productmedia')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variant_media', to='product.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Product Variant Media',
+                'verbose_name_plural': 'Product Variant Media',
+                'unique_together': {('variant', 'media')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productmedia',
+            index=models.Index(fields=['product', 'sort_order'], name='product_pro_product_9def6a_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+import core.storage
+import core.utils.image_path
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_product_default_variant_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='background_image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.utils.image_path.upload_category_background_image),
+        ),
+        migrations.AlterField(
+            model_name='productmedia',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.utils.image_path.upload_product_media),
+        ),
+    ]
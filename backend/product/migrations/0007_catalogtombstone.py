@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_alter_category_background_image_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('product', 'A deleted product'), ('variant', 'A deleted product variant')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Catalog Tombstone',
+                'verbose_name_plural': 'Catalog Tombstones',
+                'indexes': [models.Index(fields=['object_type', 'deleted_at'], name='product_cat_object__939ad1_idx')],
+            },
+        ),
+    ]
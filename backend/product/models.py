@@ -1,6 +1,8 @@
 from uuid import uuid4
+from itertools import islice
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Now
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 
@@ -9,14 +11,16 @@ from mptt.models import MPTTModel
 from measurement.measures import Weight
 from django_measurement.models import MeasurementField
 
-from . import ProductMediaTypes
+from . import ProductMediaTypes, TombstoneTypes
 from product.validators import validate_upc
-from product.utils import generate_product_code, generate_upc_ean13, generate_upc_code, generate_ean13_code
+from product.barcodes import barcode_allocator
+from product.prices import schedule_price_summary_update
 from core import settings
 from core.utils.image_path import upload_category_background_image, upload_product_media
 from core.utils.weight import zero_weight
 from core.units import WeightUnits
 from core.models import SortableModel
+from core.storage import content_addressed_storage
 
 class Category(MPTTModel):
     name = models.CharField(max_length=250)
@@ -29,17 +33,23 @@ class Category(MPTTModel):
         related_name="children",
         on_delete=models.CASCADE
     )
-    background_image = models.ImageField(upload_to=upload_category_background_image, blank=True, null=True)
+    background_image = models.ImageField(
+        upload_to=upload_category_background_image,
+        storage=content_addressed_storage,
+        blank=True,
+        null=True
+    )
     background_image_alt = models.CharField(max_length=128, blank=True)
 
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     def childrens(self):
-        Category.objects.filter(parent=self)
+        return self.get_children()
 
     @property
     def any_children(self):
-        return Category.objects.filter(parent=self).exists()
+        # lft/rght already tell whether there are descendants, no query needed
+        return not self.is_leaf_node()
     
     def __str__(self) -> str:
         return self.name
@@ -56,15 +66,30 @@ class ProductType(models.Model):
     is_shipping_required = models.BooleanField(default=True)
     is_digital = models.BooleanField(default=False)
 
+    updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
+
     def __str__(self) -> str:
         return self.name
     
     class Meta:
-        ordering = ('slug')
+        ordering = ('slug',)
         verbose_name = _('Product Type')
         verbose_name_plural = ('Product Types')
 
 
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Load everything a listing page needs in a constant number of queries:
+        product type, category and default variant are joined, and only the
+        first image of each product is prefetched (sliced prefetch, done with a
+        window function per product). get_first_image() then reads the cache.
+        """
+        first_images = ProductMedia.objects.filter(media_type=ProductMediaTypes.IMAGE)[:1]
+        return self.select_related("product_type", "category", "default_variant").prefetch_related(
+            models.Prefetch("media", queryset=first_images, to_attr="prefetched_first_images")
+        )
+
 class Product(models.Model):
     product_type = models.ForeignKey(
         ProductType,
@@ -101,26 +126,112 @@ class Product(models.Model):
 
     rating = models.FloatField(null=True, blank=True)
 
+    # Price summary of the variants, kept up to date by product.prices
+    min_selling_price = models.DecimalField(
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    max_selling_price = models.DecimalField(
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    min_cost_price = models.DecimalField(
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    variant_count = models.PositiveIntegerField(default=0, editable=False)
+    default_variant_price = models.DecimalField(
+        max_digits=settings.DEFAULT_MAX_DIGITS,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Keep the loaded values so signals can apply changes incrementally
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def get_all_media(self):
         return self.media.all()
 
     def get_first_image(self):
+        if hasattr(self, "prefetched_first_images"):
+            images = self.prefetched_first_images
+            return images[0] if images else None
         all_media = self.get_all_media()
-        images = [media for media in all_media if media.type == ProductMediaTypes.IMAGE]
+        images = [media for media in all_media if media.media_type == ProductMediaTypes.IMAGE]
         return images[0] if images else None
 
     def __str__(self) -> str:
         return self.name
     
     class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['is_active', 'min_selling_price', 'id']),
+        ]
         verbose_name = _('Product')
         verbose_name_plural = _('Products')
 
+class ProductVariantQuerySet(models.QuerySet):
+    def with_weight_grams(self):
+        """Annotate weight_grams: the effective weight as a float, see product.weights"""
+        from product.weights import effective_weight_grams
+        return self.annotate(weight_grams=effective_weight_grams())
+
+
+class ProductVariantManager(models.Manager):
+    def fill_codes(self, variants):
+        """
+        Fill variant code, UPC and EAN-13 in memory for the variants that
+        miss them, the same way ProductVariant.save() does.
+        """
+        barcode_allocator.complete(variants)
+        return variants
+
+    def bulk_create_with_codes(self, rows, batch_size=1000):
+        """
+        Create variants from model instances or field dicts with batched
+        INSERTs. Barcodes for a whole batch are allocated with one block
+        instead of going through save() for every row.
+
+        `rows` may be any iterable (a generator for big imports), it is
+        consumed `batch_size` rows at a time.
+        """
+        rows = iter(rows)
+        created = []
+        with transaction.atomic(using=self.db):
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                variants = [row if isinstance(row, self.model) else self.model(**row) for row in chunk]
+                self.fill_codes(variants)
+                created.extend(self.bulk_create(variants, batch_size=batch_size))
+            # bulk_create() sends no signals
+            schedule_price_summary_update({variant.product_id for variant in created})
+        return created
+
 class ProductVariant(models.Model):
     product = models.ForeignKey(
         Product,
@@ -131,7 +242,7 @@ class ProductVariant(models.Model):
     #
     sku = models.CharField(max_length=64, unique=True)
 
-    variant_code = models.CharField(max_length=5, unique=True, null=True, blank=True)
+    variant_code = models.CharField(max_length=12, unique=True, null=True, blank=True)
     upc_code = models.CharField(
         max_length=12,
         unique=True,
@@ -170,7 +281,10 @@ class ProductVariant(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductVariantManager.from_queryset(ProductVariantQuerySet)()
+
     def get_weight(self):
+        # Loads the product when it is not cached, use product.weights for many variants
         return self.weight or self.product.weight
     
     def is_shipping_required(self) -> bool:
@@ -183,19 +297,62 @@ class ProductVariant(models.Model):
         return self.name or self.sku or f'ID: {self.pk}'
     
     def save(self, *args, **kwargs):
-        if not self.variant_code:
-            self.variant_code = generate_product_code()        
-        #self.upc_code, self.ean13_code = generate_upc_ean13(product_code=self.variant_code)
-        if not self.upc_code:
-            self.upc_code = generate_upc_code(product_code=self.variant_code)
-        if not self.ean13_code:
-            self.ean13_code = generate_ean13_code(product_code=self.variant_code)
+        barcode_allocator.complete([self])
         super().save(*args, **kwargs)
     
     class Meta:
+        indexes = [models.Index(fields=['product', 'created_at', 'id'])]
         verbose_name = _('Product Variant')
         verbose_name_plural = _('Product Variants')
 
+class ProductSearchDocument(models.Model):
+    """Denormalized text of a product, kept in sync by signals for the search index"""
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document"
+    )
+    name = models.TextField(blank=True)
+    category_path = models.TextField(blank=True)
+    # SKUs, variant names, UPC and EAN-13 codes
+    identifiers = models.TextField(blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+    class Meta:
+        verbose_name = _('Product Search Document')
+        verbose_name_plural = _('Product Search Documents')
+
+class CatalogTombstone(models.Model):
+    """
+    A deleted product or variant. In-memory indexes refresh from updated_at,
+    which never shows a deletion; they read these to drop deleted rows.
+    """
+    object_type = models.CharField(max_length=16, choices=TombstoneTypes.CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['object_type', 'deleted_at'])]
+        verbose_name = _('Catalog Tombstone')
+        verbose_name_plural = _('Catalog Tombstones')
+
+class BarcodeSequence(models.Model):
+    """Next free item serial for a country + producer barcode prefix"""
+    prefix = models.CharField(max_length=12, unique=True)
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.prefix}: {self.next_value}'
+
+    class Meta:
+        verbose_name = _('Barcode Sequence')
+        verbose_name_plural = _('Barcode Sequences')
+
 class ProductMedia(SortableModel):
     product = models.ForeignKey(
         Product,
@@ -203,7 +360,7 @@ class ProductMedia(SortableModel):
         related_name="media"
     )
 
-    image = models.ImageField(upload_to=upload_product_media, null=True, blank=True)
+    image = models.ImageField(upload_to=upload_product_media, storage=content_addressed_storage, null=True, blank=True)
     alt = models.CharField(max_length=255, blank=True)
     media_type = models.CharField(
         max_length=32,
@@ -212,6 +369,16 @@ class ProductMedia(SortableModel):
     )
     external_url = models.CharField(max_length=255, null=True, blank=True)
 
+    # Gapped ranks: inserts, deletes and drag-and-drop moves touch a constant number of rows
+    sort_order_gap = 1024
+
+    @classmethod
+    def move(cls, items, new_positions):
+        items = list(items)
+        super().move(items, new_positions)
+        # bulk_update sends no signal and the first image may have changed
+        Product.objects.filter(pk__in={item.product_id for item in items}).update(updated_at=Now())
+
     def get_ordering_queryset(self):
         if not self.product:
             return ProductMedia.objects.none()
@@ -223,6 +390,7 @@ class ProductMedia(SortableModel):
     
     class Meta:
         ordering = ('sort_order', 'pk')
+        indexes = [models.Index(fields=['product', 'sort_order'])]
         verbose_name = _('Product Media')
         verbose_name_plural = _('Product Media')
 
@@ -244,7 +412,7 @@ class VariantMedia(models.Model):
     class Meta:
         unique_together = ("variant", "media")
         verbose_name = _('Product Variant Media')
-        verbose_name_plurals = _('Product Variant Media')
+        verbose_name_plural = _('Product Variant Media')
 
     
     
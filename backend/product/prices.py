@@ -0,0 +1,71 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+# Denormalized price fields of Product and the variant aggregate behind each
+PRICE_SUMMARY_FIELDS = (
+    "min_selling_price", "max_selling_price", "min_cost_price", "variant_count", "default_variant_price",
+)
+
+_pending = threading.local()
+
+
+def price_summary_expressions():
+    """Correlated subqueries computing every price summary field of a product, for update()"""
+    from product.models import ProductVariant
+
+    variants = ProductVariant.objects.filter(product=OuterRef("pk")).order_by().values("product")
+
+    def aggregate(function):
+        return Subquery(variants.annotate(value=function).values("value"))
+
+    return {
+        "min_selling_price": aggregate(Min("selling_price")),
+        "max_selling_price": aggregate(Max("selling_price")),
+        "min_cost_price": aggregate(Min("cost_price")),
+        "variant_count": Coalesce(aggregate(Count("pk")), Value(0)),
+        "default_variant_price": Subquery(
+            ProductVariant.objects.filter(pk=OuterRef("default_variant_id")).values("selling_price")[:1]
+        ),
+    }
+
+
+def update_price_summaries(product_ids=None):
+    """
+    Recompute the price summary of these products (all when None) with one
+    UPDATE. update() skips auto_now and sends no signal, so updated_at is
+    set here for ETags and delta snapshots, and the facet index is
+    invalidated.
+    """
+    from product.facets import invalidate_facet_index
+    from product.models import Product
+
+    products = Product.objects.all()
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        products = products.filter(pk__in=product_ids)
+    updated = products.update(updated_at=Now(), **price_summary_expressions())
+    invalidate_facet_index()
+    return updated
+
+
+def _flush_price_summaries():
+    product_ids = getattr(_pending, "product_ids", None)
+    if product_ids:
+        _pending.product_ids = set()
+        update_price_summaries(product_ids)
+
+
+def schedule_price_summary_update(product_ids):
+    """
+    Update the summaries once the current transaction commits. Products
+    touched several times in one transaction are updated once.
+    """
+    if not hasattr(_pending, "product_ids"):
+        _pending.product_ids = set()
+    _pending.product_ids.update(product_id for product_id in product_ids if product_id)
+    transaction.on_commit(_flush_price_summaries)
@@ -0,0 +1,260 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import transaction
+
+from product import TombstoneTypes
+from product.category_tree import get_category_tree
+from product.tombstones import TOMBSTONE_OVERLAP, TombstoneWatcher, prune_tombstones
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Weight of a match in each part of the search document
+NAME_WEIGHT = 3.0
+IDENTIFIER_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+# A prefix match scores this fraction of an exact match
+PREFIX_FACTOR = 0.5
+# Shorter query tokens only match exactly, longer ones also as prefix
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSION = 200
+
+# How often (seconds) an index picks up documents written by other processes
+SEARCH_INDEX_REFRESH_INTERVAL = 10
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+# Documents
+def build_search_documents(product_ids):
+    """
+    Build ProductSearchDocument instances for many products with two
+    queries; category paths come from the cached category tree.
+    """
+    from product.models import Product, ProductSearchDocument, ProductVariant
+
+    identifiers = {}
+    variants = ProductVariant.objects.filter(product_id__in=product_ids).values_list(
+        "product_id", "sku", "name", "upc_code", "ean13_code"
+    )
+    for product_id, *values in variants:
+        identifiers.setdefault(product_id, []).extend(value for value in values if value)
+
+    tree = get_category_tree()
+    documents = []
+    for product_id, name, category_id in Product.objects.filter(pk__in=product_ids).values_list(
+        "pk", "name", "category_id"
+    ):
+        category_path = ""
+        if category_id in tree:
+            category_path = " > ".join(node.name for node in tree.get_ancestors(category_id, include_self=True))
+        documents.append(ProductSearchDocument(
+            product_id=product_id,
+            name=name,
+            category_path=category_path,
+            identifiers=" ".join(identifiers.get(product_id, [])),
+        ))
+    return documents
+
+
+def update_search_documents(product_ids):
+    """Rewrite the search documents of these products and update the local index"""
+    from product.models import ProductSearchDocument
+
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return
+    documents = build_search_documents(product_ids)
+    ProductSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=["name", "category_path", "identifiers", "updated_at"],
+    )
+    for document in documents:
+        search_index.update(document)
+
+
+class SearchIndex:
+    """
+    In-process inverted index over ProductSearchDocument.
+
+    Tokens map to {product_id: weight}. The vocabulary is kept sorted so
+    prefix matches are a bisect plus a short scan. All query tokens must
+    match (AND), products are ranked by the sum of their best match per
+    token.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.document_tokens = {}
+        self.loaded = False
+        self.watermark = None
+        self.refreshed_at = 0
+        self.deletions = TombstoneWatcher(TombstoneTypes.PRODUCT)
+        self._lock = threading.RLock()
+
+    def _reset(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.document_tokens = {}
+        self.watermark = None
+
+    def _add(self, product_id, tokens):
+        for token, weight in tokens.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                insort(self.vocabulary, token)
+            postings[product_id] = weight
+        self.document_tokens[product_id] = tokens
+
+    def remove(self, product_id):
+        with self._lock:
+            for token in self.document_tokens.pop(product_id, {}):
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(product_id, None)
+                    # Empty tokens stay in the vocabulary, they just match nothing
+
+    @staticmethod
+    def document_tokens_of(document):
+        tokens = {}
+        for text, weight in (
+            (document.category_path, CATEGORY_WEIGHT),
+            (document.identifiers, IDENTIFIER_WEIGHT),
+            (document.name, NAME_WEIGHT),
+        ):
+            for token in tokenize(text):
+                tokens[token] = max(tokens.get(token, 0), weight)
+        return tokens
+
+    def update(self, document):
+        with self._lock:
+            if not self.loaded:
+                return
+            self.remove(document.product_id)
+            self._add(document.product_id, self.document_tokens_of(document))
+
+    def refresh(self):
+        """
+        Load all documents, or only those changed since the last load and
+        drop the products deleted since then.
+        """
+        from product.models import ProductSearchDocument
+
+        with self._lock:
+            documents = ProductSearchDocument.objects.order_by("updated_at")
+            if self.loaded and self.watermark is not None and not self.deletions.needs_reload():
+                for product_id in self.deletions.deleted_ids():
+                    self.remove(product_id)
+                # Documents are stamped before their transaction commits, re-read a window; re-adding is harmless
+                documents = documents.filter(updated_at__gte=self.watermark - TOMBSTONE_OVERLAP)
+            else:
+                self._reset()
+                self.deletions.start()
+                prune_tombstones()
+            for document in documents.iterator(chunk_size=5000):
+                self.remove(document.product_id)
+                self._add(document.product_id, self.document_tokens_of(document))
+                self.watermark = document.updated_at
+            self.loaded = True
+            self.refreshed_at = time.monotonic()
+
+    def _token_scores(self, token):
+        scores = {}
+        postings = self.postings.get(token)
+        if postings:
+            scores.update(postings)
+        if len(token) < MIN_PREFIX_LENGTH:
+            return scores
+
+        start = bisect_left(self.vocabulary, token)
+        for word in self.vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not word.startswith(token):
+                break
+            if word == token:
+                continue
+            for product_id, weight in self.postings[word].items():
+                score = weight * PREFIX_FACTOR
+                if score > scores.get(product_id, 0):
+                    scores[product_id] = score
+        return scores
+
+    def search(self, query, limit=20):
+        """Return up to `limit` (product_id, score) pairs, best first; every match with limit=None"""
+        if not self.loaded or time.monotonic() - self.refreshed_at > SEARCH_INDEX_REFRESH_INTERVAL:
+            self.refresh()
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            scores = None
+            for token in dict.fromkeys(tokens):
+                token_scores = self._token_scores(token)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        product_id: score + token_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in token_scores
+                    }
+                if not scores:
+                    return []
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+search_index = SearchIndex()
+
+
+def search_product_ids(query, limit=20, queryset=None):
+    """
+    Ids of the best `limit` matches. With `queryset`, only products in it
+    count: ranked matches are checked against it in batches until `limit`
+    are found, so filtered out products never shorten the result.
+    """
+    if queryset is None:
+        return [product_id for product_id, _score in search_index.search(query, limit=limit)]
+
+    ranked = [product_id for product_id, _score in search_index.search(query, limit=None)]
+    batch_size = max(limit * 2, 100)
+    product_ids = []
+    for start in range(0, len(ranked), batch_size):
+        batch = ranked[start:start + batch_size]
+        allowed = set(queryset.filter(pk__in=batch).values_list("pk", flat=True))
+        product_ids.extend(product_id for product_id in batch if product_id in allowed)
+        if len(product_ids) >= limit:
+            break
+    return product_ids[:limit]
+
+
+def schedule_search_update(product_ids):
+    """Update the documents once the current transaction commits"""
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: update_search_documents(product_ids))
+
+
+def schedule_category_search_update(category_id):
+    """A renamed or moved category changes the path of every product below it"""
+    from product.models import Product
+
+    def update():
+        tree = get_category_tree()
+        if category_id not in tree:
+            return
+        product_ids = Product.objects.filter(
+            category_id__in=tree.get_descendant_ids(category_id)
+        ).values_list("pk", flat=True)
+        update_search_documents(product_ids)
+
+    transaction.on_commit(update)
@@ -0,0 +1,102 @@
+"""
+Read-only catalog serializers working on values() rows.
+
+Listing endpoints read a fixed set of columns with values() and turn each
+row into a dict here, skipping ModelSerializer field introspection and
+model instantiation.
+"""
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef, Subquery
+from rest_framework import serializers
+
+from core.renditions import rendition_urls
+from product import ProductMediaTypes
+from product.models import ProductMedia
+
+
+def first_image_subquery():
+    """Image path of the first image of each product, for annotate()"""
+    return Subquery(
+        ProductMedia.objects
+        .filter(product=OuterRef('pk'), media_type=ProductMediaTypes.IMAGE)
+        .order_by('sort_order', 'pk')
+        .values('image')[:1]
+    )
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def decimal_or_none(value):
+    # Same representation as DRF's DecimalField
+    return str(value) if value is not None else None
+
+
+class ProductListSerializer:
+    fields = (
+        'id', 'uuid', 'name', 'slug', 'rating', 'created_at', 'updated_at',
+        'category__slug', 'product_type__slug',
+        'default_variant__sku', 'default_variant__selling_price',
+        'min_selling_price', 'max_selling_price', 'variant_count',
+        'first_image',
+    )
+
+    @staticmethod
+    def to_representation(row):
+        return {
+            'id': row['id'],
+            'uuid': row['uuid'],
+            'name': row['name'],
+            'slug': row['slug'],
+            'rating': row['rating'],
+            'category': row['category__slug'],
+            'product_type': row['product_type__slug'],
+            'default_variant': {
+                'sku': row['default_variant__sku'],
+                'selling_price': decimal_or_none(row['default_variant__selling_price']),
+            } if row['default_variant__sku'] else None,
+            'price_range': {
+                'min': decimal_or_none(row['min_selling_price']),
+                'max': decimal_or_none(row['max_selling_price']),
+            },
+            'variant_count': row['variant_count'],
+            'image': rendition_urls(row['first_image']),
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+
+class ProductDetailSerializer(ProductListSerializer):
+    fields = ProductListSerializer.fields + ('description', 'product_type__name', 'category__name')
+
+    @staticmethod
+    def to_representation(row):
+        data = ProductListSerializer.to_representation(row)
+        data['description'] = row['description']
+        data['product_type_name'] = row['product_type__name']
+        data['category_name'] = row['category__name']
+        data['original_image'] = media_url(row['first_image'])
+        return data
+
+
+class ProductVariantSerializer:
+    fields = (
+        'id', 'sku', 'name', 'variant_code', 'upc_code', 'ean13_code',
+        'selling_price', 'quantity_limit_per_customer', 'created_at', 'updated_at',
+    )
+
+    @staticmethod
+    def to_representation(row):
+        data = dict(row)
+        data['selling_price'] = decimal_or_none(row['selling_price'])
+        return data
+
+
+class BarcodeScanSerializer(serializers.Serializer):
+    """Request body of a batch scan"""
+    max_codes = 1000
+
+    codes = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, trim_whitespace=False), max_length=max_codes
+    )
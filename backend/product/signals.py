@@ -0,0 +1,117 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from product import TombstoneTypes
+
+from product.barcode_lookup import barcode_lookup
+from product.category_tree import invalidate_category_tree, update_category_product_count
+from product.facets import invalidate_facet_index
+from product.models import Category, Product, ProductMedia, ProductVariant
+from product.prices import schedule_price_summary_update
+from product.search import schedule_category_search_update, schedule_search_update, search_index
+from product.tombstones import record_deletion
+
+
+# Category tree
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver(post_save, sender=Product)
+def product_saved_update_category_tree(sender, instance, created, **kwargs):
+    loaded = getattr(instance, "_loaded_values", None)
+    if not created and (loaded is None or not {"category_id", "is_active"} <= loaded.keys()):
+        # We don't know what the row looked like before, rebuild on next read
+        invalidate_category_tree()
+        return
+
+    if not created and loaded["is_active"]:
+        update_category_product_count(loaded["category_id"], -1)
+    if instance.is_active:
+        update_category_product_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted_update_category_tree(sender, instance, **kwargs):
+    if instance.is_active:
+        update_category_product_count(instance.category_id, -1)
+
+
+# Search documents
+@receiver(post_save, sender=Product)
+def product_saved_update_search(sender, instance, **kwargs):
+    schedule_search_update([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted_update_search(sender, instance, **kwargs):
+    # Other processes drop it when they read the tombstone
+    record_deletion(TombstoneTypes.PRODUCT, instance.pk)
+    transaction.on_commit(partial(search_index.remove, instance.pk))
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def variant_changed_update_search(sender, instance, **kwargs):
+    schedule_search_update([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+def category_saved_update_search(sender, instance, created, **kwargs):
+    if not created:
+        schedule_category_search_update(instance.pk)
+
+
+# Price summaries
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def variant_changed_update_price_summary(sender, instance, **kwargs):
+    schedule_price_summary_update([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def product_saved_update_price_summary(sender, instance, created, **kwargs):
+    loaded = getattr(instance, "_loaded_values", None)
+    if created or loaded is None or loaded.get("default_variant_id") != instance.default_variant_id:
+        schedule_price_summary_update([instance.pk])
+
+
+# Barcode lookup
+@receiver(post_delete, sender=ProductVariant)
+def variant_deleted_update_barcode_lookup(sender, instance, **kwargs):
+    record_deletion(TombstoneTypes.VARIANT, instance.pk)
+    transaction.on_commit(partial(barcode_lookup.remove, instance.pk))
+
+
+# Media is part of the product payload, its ETag follows Product.updated_at
+@receiver(post_save, sender=ProductMedia)
+@receiver(post_delete, sender=ProductMedia)
+def media_changed_touch_product(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).update(updated_at=Now())
+
+
+# Facet index
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed_invalidate_facet_index(sender, instance, **kwargs):
+    invalidate_facet_index()
+
+
+# Registered last so the receivers above still see the values before the save
+@receiver(post_save, sender=Product)
+def product_saved_remember_values(sender, instance, **kwargs):
+    instance._loaded_values = {
+        "category_id": instance.category_id,
+        "is_active": instance.is_active,
+        "default_variant_id": instance.default_variant_id,
+    }
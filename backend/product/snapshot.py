@@ -0,0 +1,423 @@
+"""
+Binary columnar catalog snapshots for POS terminals and edge workers.
+
+A snapshot is a sequence of 8-byte aligned column sections followed by a
+JSON directory:
+
+    b"DSCATLG1" | column sections ... | directory (JSON) | u64 directory length | b"DSCATLG1"
+
+Integer columns are little-endian int64 arrays (NULL is INT_NULL), prices
+are int64 scaled by 10 ** scale, timestamps are float64 epoch seconds and
+strings are an int64 offsets array (rows + 1) followed by the UTF-8 data.
+Every table is ordered by id and `barcodes` by code, so the reader finds
+rows with a binary search over the memory-mapped columns.
+
+The writer streams rows from the database into one temporary file per
+column, so memory stays flat whatever the catalog size.
+"""
+import json
+import mmap
+import shutil
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+from heapq import merge
+from itertools import islice
+
+from django.db import connection
+from django.db.models.functions import Collate
+from django.utils import timezone
+
+from core import settings
+
+MAGIC = b"DSCATLG1"
+FORMAT_VERSION = 1
+INT_NULL = -(2 ** 63)
+BUFFER_ROWS = 65536
+CHUNK_SIZE = 5000
+
+
+def _to_little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _align(file):
+    padding = -file.tell() % 8
+    if padding:
+        file.write(b"\0" * padding)
+
+
+# Writer
+class _Column:
+    def __init__(self, name):
+        self.name = name
+        self.file = tempfile.TemporaryFile()
+
+    def close(self):
+        self.file.close()
+
+
+class _IntColumn(_Column):
+    kind = "int"
+    typecode = "q"
+
+    def __init__(self, name, scale=0):
+        super().__init__(name)
+        self.scale = scale
+        self.buffer = array(self.typecode)
+
+    def convert(self, value):
+        if value is None:
+            return INT_NULL
+        if self.scale:
+            return int(Decimal(value).scaleb(self.scale))
+        return int(value)
+
+    def extend(self, values):
+        self.buffer.extend(map(self.convert, values))
+        if len(self.buffer) >= BUFFER_ROWS:
+            self.flush()
+
+    def flush(self):
+        self.file.write(_to_little_endian(self.buffer).tobytes())
+        self.buffer = array(self.typecode)
+
+    def write_to(self, out):
+        self.flush()
+        _align(out)
+        self.file.seek(0)
+        offset = out.tell()
+        shutil.copyfileobj(self.file, out)
+        info = {"type": self.kind, "offset": offset, "length": out.tell() - offset}
+        if self.scale:
+            info["scale"] = self.scale
+        return info
+
+
+class _FloatColumn(_IntColumn):
+    kind = "float"
+    typecode = "d"
+
+    def convert(self, value):
+        if value is None:
+            return float("nan")
+        if hasattr(value, "timestamp"):
+            return value.timestamp()
+        return float(value)
+
+
+class _StrColumn(_Column):
+    kind = "str"
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.offsets = _IntColumn(name)
+        self.offsets.extend([0])
+        self.position = 0
+
+    def extend(self, values):
+        data = [str(value).encode() if value else b"" for value in values]
+        offsets = []
+        position = self.position
+        for item in data:
+            position += len(item)
+            offsets.append(position)
+        self.file.write(b"".join(data))
+        self.offsets.extend(offsets)
+        self.position = position
+
+    def write_to(self, out):
+        info = self.offsets.write_to(out)
+        self.file.seek(0)
+        info["type"] = self.kind
+        info["data_offset"] = out.tell()
+        shutil.copyfileobj(self.file, out)
+        info["data_length"] = out.tell() - info["data_offset"]
+        return info
+
+    def close(self):
+        super().close()
+        self.offsets.close()
+
+
+PRICE_SCALE = settings.DEFAULT_DECIMAL_PLACES
+
+# table: {column: (column class, kwargs)}, columns are model fields or annotations
+TABLES = {
+    "categories": {
+        "id": (_IntColumn, {}),
+        "parent_id": (_IntColumn, {}),
+        "name": (_StrColumn, {}),
+        "slug": (_StrColumn, {}),
+        "updated_at": (_FloatColumn, {}),
+    },
+    "product_types": {
+        "id": (_IntColumn, {}),
+        "name": (_StrColumn, {}),
+        "slug": (_StrColumn, {}),
+        "is_shipping_required": (_IntColumn, {}),
+        "is_digital": (_IntColumn, {}),
+    },
+    "products": {
+        "id": (_IntColumn, {}),
+        "product_type_id": (_IntColumn, {}),
+        "category_id": (_IntColumn, {}),
+        "name": (_StrColumn, {}),
+        "slug": (_StrColumn, {}),
+        "is_active": (_IntColumn, {}),
+        "default_variant_id": (_IntColumn, {}),
+        "min_selling_price": (_IntColumn, {"scale": PRICE_SCALE}),
+        "max_selling_price": (_IntColumn, {"scale": PRICE_SCALE}),
+        "first_image": (_StrColumn, {}),
+        "updated_at": (_FloatColumn, {}),
+    },
+    "variants": {
+        "id": (_IntColumn, {}),
+        "product_id": (_IntColumn, {}),
+        "sku": (_StrColumn, {}),
+        "name": (_StrColumn, {}),
+        "variant_code": (_StrColumn, {}),
+        "upc_code": (_StrColumn, {}),
+        "ean13_code": (_StrColumn, {}),
+        "selling_price": (_IntColumn, {"scale": PRICE_SCALE}),
+        "quantity_limit_per_customer": (_IntColumn, {}),
+        "updated_at": (_FloatColumn, {}),
+    },
+    "barcodes": {
+        "code": (_StrColumn, {}),
+        "variant_id": (_IntColumn, {}),
+    },
+    # Delta snapshots only: every live id, so clients can drop deleted rows
+    "category_ids": {"id": (_IntColumn, {})},
+    "product_ids": {"id": (_IntColumn, {})},
+    "variant_ids": {"id": (_IntColumn, {})},
+}
+
+
+def _byte_order(field):
+    # The reader bisects codes as UTF-8 bytes, the database must sort them the same way
+    collation = {"postgresql": "C", "sqlite": "BINARY"}.get(connection.vendor)
+    return Collate(field, collation).asc() if collation else field
+
+
+def _table_rows(since=None):
+    """Yield (table name, rows iterator) in export order"""
+    from product.models import Category, Product, ProductType, ProductVariant
+    from product.serializers import first_image_subquery
+
+    def changed(queryset):
+        return queryset.filter(updated_at__gte=since) if since is not None else queryset
+
+    def rows(queryset, table):
+        return queryset.order_by("pk").values_list(*TABLES[table]).iterator(chunk_size=CHUNK_SIZE)
+
+    yield "categories", rows(changed(Category.objects.all()), "categories")
+    yield "product_types", rows(ProductType.objects.all(), "product_types")
+    yield "products", rows(changed(Product.objects.annotate(first_image=first_image_subquery())), "products")
+
+    variants = changed(ProductVariant.objects.all())
+    yield "variants", rows(variants, "variants")
+
+    # One query per code kind, each sorted by the database, merged as a stream
+    code_rows = [
+        variants.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+        .order_by(_byte_order(field)).values_list(field, "pk").iterator(chunk_size=CHUNK_SIZE)
+        for field in ("upc_code", "ean13_code", "sku")
+    ]
+    yield "barcodes", merge(*code_rows)
+
+    if since is not None:
+        yield "category_ids", rows(Category.objects.all(), "category_ids")
+        yield "product_ids", rows(Product.objects.all(), "product_ids")
+        yield "variant_ids", rows(ProductVariant.objects.all(), "variant_ids")
+
+
+def write_snapshot(out, since=None, progress=None):
+    """
+    Stream the catalog into the binary file object `out`. With `since`,
+    only rows updated from then on are written, plus the live id tables.
+    Returns the directory written to the file.
+    """
+    created_at = timezone.now()
+    directory = {
+        "version": FORMAT_VERSION,
+        "created_at": created_at.isoformat(),
+        "since": since.isoformat() if since is not None else None,
+        "tables": {},
+    }
+    out.write(MAGIC)
+
+    for table, rows in _table_rows(since):
+        columns = [column_class(name, **kwargs) for name, (column_class, kwargs) in TABLES[table].items()]
+        try:
+            count = 0
+            while True:
+                chunk = list(islice(rows, CHUNK_SIZE))
+                if not chunk:
+                    break
+                for column, values in zip(columns, zip(*chunk)):
+                    column.extend(values)
+                count += len(chunk)
+            directory["tables"][table] = {
+                "rows": count,
+                "columns": {column.name: column.write_to(out) for column in columns},
+            }
+        finally:
+            for column in columns:
+                column.close()
+        if progress is not None:
+            progress(table, count)
+
+    _align(out)
+    data = json.dumps(directory).encode()
+    out.write(data)
+    out.write(_to_little_endian(array("Q", [len(data)])).tobytes())
+    out.write(MAGIC)
+    return directory
+
+
+# Reader
+class StringColumn:
+    """Zero-copy view of a string column; items are decoded on access"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+    def __getitem__(self, index):
+        return bytes(self.raw(index)).decode()
+
+
+class _RawKeys:
+    # Sequence of encoded strings for bisect without decoding the column
+    def __init__(self, column):
+        self.column = column
+
+    def __len__(self):
+        return len(self.column)
+
+    def __getitem__(self, index):
+        return bytes(self.column.raw(index))
+
+
+class SnapshotTable:
+    def __init__(self, name, rows, columns):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.scales = {}
+
+    def __len__(self):
+        return self.rows
+
+    def value(self, column, index):
+        value = self.columns[column][index]
+        if isinstance(value, int) and value == INT_NULL:
+            return None
+        if column in self.scales:
+            return Decimal(value).scaleb(-self.scales[column])
+        return value
+
+    def row(self, index):
+        return {column: self.value(column, index) for column in self.columns}
+
+    def find(self, key, column="id"):
+        """Row index of `key` in a column the table is sorted by, or None"""
+        values = self.columns[column]
+        if isinstance(values, StringColumn):
+            key = key.encode()
+            values = _RawKeys(values)
+        index = bisect_left(values, key)
+        if index < len(values) and values[index] == key:
+            return index
+        return None
+
+    def get(self, key, column="id"):
+        index = self.find(key, column)
+        return self.row(index) if index is not None else None
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped snapshot. Columns are memoryviews over the mapping, so
+    opening a file reads only its directory.
+
+        with CatalogSnapshot("catalog.bin") as snapshot:
+            snapshot.variant_by_code("869123400001")
+    """
+
+    def __init__(self, path):
+        if sys.byteorder == "big":
+            raise ValueError("Catalog snapshots are little-endian")
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        if self._view[:8] != MAGIC or self._view[-8:] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+        length = self._view[-16:-8].cast("Q")[0]
+        self.directory = json.loads(bytes(self._view[-16 - length:-16]))
+        self.created_at = self.directory["created_at"]
+        self.since = self.directory["since"]
+
+        self.tables = {}
+        for name, info in self.directory["tables"].items():
+            table = SnapshotTable(name, info["rows"], {})
+            for column, column_info in info["columns"].items():
+                table.columns[column] = self._column(column_info)
+                if "scale" in column_info:
+                    table.scales[column] = column_info["scale"]
+            self.tables[name] = table
+
+    def _column(self, info):
+        section = self._view[info["offset"]:info["offset"] + info["length"]]
+        if info["type"] == "str":
+            data = self._view[info["data_offset"]:info["data_offset"] + info["data_length"]]
+            return StringColumn(section.cast("q"), data)
+        return section.cast("d" if info["type"] == "float" else "q")
+
+    @property
+    def is_delta(self):
+        return self.since is not None
+
+    def product(self, product_id):
+        return self.tables["products"].get(product_id)
+
+    def variant(self, variant_id):
+        return self.tables["variants"].get(variant_id)
+
+    def variant_by_code(self, code):
+        """Variant row for a UPC, EAN-13 or SKU"""
+        barcodes = self.tables["barcodes"]
+        index = barcodes.find(code, column="code")
+        if index is None:
+            return None
+        return self.variant(barcodes.value("variant_id", index))
+
+    def close(self):
+        # Views over the mapping must be released before it can be closed
+        for table in getattr(self, "tables", {}).values():
+            for column in table.columns.values():
+                for view in (column.offsets, column.data) if isinstance(column, StringColumn) else (column,):
+                    view.release()
+        self.tables = {}
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
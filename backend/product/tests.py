@@ -1,3 +1,664 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from measurement.measures import Weight
+from rest_framework.test import APIClient
+
+from product.barcodes import BarcodeAllocator
+from product.category_tree import get_category_tree
+from product.importer import ProductImporter
+from product.management.commands import warm_thumbnails
+from product import ProductMediaTypes
+from product.models import Category, Product, ProductMedia, ProductSearchDocument, ProductType, ProductVariant
+from account.models import User
+from product import facets
+from product.barcode_lookup import BarcodeLookup, barcode_lookup
+from product.search import SearchIndex, search_index
+from product.snapshot import CatalogSnapshot, write_snapshot
+
+from product.utils import (
+    calculate_check_digit,
+    calculate_check_digits,
+    check_digit_weights,
+    generate_upc_code,
+    verify_check_digits,
+)
+from product.validators import validate_ean13_many, validate_upc_many
+from product.weights import get_variant_weights
+
+# Published codes with known good check digits
+UPC_CODES = ['036000291452', '012345678905', '042100005264', '614141000036']
+EAN13_CODES = ['4006381333931', '5901234123457', '9780306406157', '9783161484100']
+
+
+class CheckDigitTests(SimpleTestCase):
+    def test_weights_are_counted_from_the_right(self):
+        self.assertEqual(check_digit_weights(11)[-1], 3)
+        self.assertEqual(check_digit_weights(12)[-1], 3)
+        self.assertEqual(check_digit_weights(11)[:3], (3, 1, 3))
+        self.assertEqual(check_digit_weights(12)[:3], (1, 3, 1))
+
+    def test_calculate_check_digit(self):
+        for code in UPC_CODES + EAN13_CODES:
+            with self.subTest(code=code):
+                self.assertEqual(calculate_check_digit(code[:-1]), int(code[-1]))
+
+    def test_calculate_check_digits_matches_scalar(self):
+        payloads = [code[:-1] for code in UPC_CODES + EAN13_CODES] + ['12340000000', '1234567']
+        expected = [calculate_check_digit(payload) for payload in payloads]
+        self.assertEqual(list(calculate_check_digits(payloads)), expected)
+
+    def test_calculate_check_digits_rejects_non_digits(self):
+        self.assertEqual(list(calculate_check_digits(['0360002914a', '03600029145'])), [-1, 2])
+
+    def test_verify_check_digits(self):
+        self.assertEqual(list(verify_check_digits(UPC_CODES, 12)), [True] * len(UPC_CODES))
+        self.assertEqual(list(verify_check_digits(EAN13_CODES, 13)), [True] * len(EAN13_CODES))
+        # Wrong check digit, wrong length, not digits
+        self.assertEqual(
+            list(verify_check_digits(['036000291453', '03600029145', '03600029145x'], 12)), [False, False, False]
+        )
+
+    def test_batch_validators(self):
+        self.assertTrue(all(validate_upc_many(UPC_CODES)))
+        self.assertTrue(all(validate_ean13_many(EAN13_CODES)))
+        self.assertFalse(any(validate_upc_many(EAN13_CODES)))
+
+    def test_generate_upc_code(self):
+        self.assertEqual(generate_upc_code(product_code='29145', producer_code='036000'), '036000291452')
+
+
+class BarcodeAllocatorTests(TestCase):
+    def test_first_code_has_a_valid_check_digit(self):
+        barcode = BarcodeAllocator(country_code='869', producer_codes=['1234']).allocate(1)[0]
+        self.assertEqual(barcode, ('123400000', '123400000002', '8691234000007'))
+
+    def test_allocate_100k_codes(self):
+        allocator = BarcodeAllocator(country_code='869', producer_codes=['1234', '1235'])
+        # One locked read and update of the sequence row for the whole block
+        with self.assertNumQueries(7):
+            barcodes = allocator.allocate(100000)
+        # The first producer code is exhausted, the next one takes over
+        barcodes += allocator.allocate(20000)
+        self.assertEqual(barcodes[-1].variant_code, '123519999')
+        self.assertEqual(len(barcodes), 120000)
+        for codes in zip(*barcodes):
+            self.assertEqual(len(set(codes)), len(barcodes))
+        self.assertTrue(all(validate_upc_many([barcode.upc_code for barcode in barcodes])))
+        self.assertTrue(all(validate_ean13_many([barcode.ean13_code for barcode in barcodes])))
+
+    def test_barcode_for_rebuilds_issued_codes(self):
+        allocator = BarcodeAllocator(country_code='869', producer_codes=['1234'])
+        barcode = allocator.allocate(1)[0]
+        self.assertEqual(allocator.barcode_for(barcode.variant_code), barcode)
+        self.assertIsNone(allocator.barcode_for('78901'))
+
+
+class ProductVariantCodeTests(TestCase):
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.product = Product.objects.create(product_type=product_type, name='Product', slug='product')
+
+    def test_save_allocates_codes(self):
+        variant = ProductVariant.objects.create(product=self.product, sku='A', selling_price=1)
+        self.assertTrue(validate_upc_many([variant.upc_code])[0])
+        self.assertTrue(validate_ean13_many([variant.ean13_code])[0])
+
+    def test_save_fills_missing_barcodes_of_a_foreign_variant_code(self):
+        variant = ProductVariant.objects.create(
+            product=self.product, sku='A', selling_price=1, variant_code='AB-123456789'
+        )
+        self.assertEqual(variant.variant_code, 'AB-123456789')
+        self.assertEqual(len(variant.upc_code), 12)
+        self.assertEqual(len(variant.ean13_code), 13)
+        self.assertTrue(validate_upc_many([variant.upc_code])[0])
+
+    def test_fill_codes_keeps_given_barcodes(self):
+        variants = ProductVariant.objects.fill_codes([
+            ProductVariant(product=self.product, sku='A', selling_price=1, upc_code='036000291452'),
+            ProductVariant(product=self.product, sku='B', selling_price=1),
+        ])
+        self.assertEqual(variants[0].upc_code, '036000291452')
+        self.assertNotEqual(variants[1].upc_code, variants[0].upc_code)
+        self.assertTrue(all(variant.variant_code and variant.ean13_code for variant in variants))
+
+
+class ProductVariantWeightTests(TestCase):
+    def test_with_weight_grams_chains_after_filter(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        product = Product.objects.create(product_type=product_type, name='Tea', slug='tea', weight=Weight(g=250))
+        own = ProductVariant.objects.create(product=product, sku='A', selling_price=1, weight=Weight(kg=1))
+        inherited = ProductVariant.objects.create(product=product, sku='B', selling_price=1)
+        variants = ProductVariant.objects.filter(product=product).with_weight_grams().order_by('sku')
+        self.assertEqual(
+            [(variant.pk, variant.weight_grams) for variant in variants], [(own.pk, 1000), (inherited.pk, 250)]
+        )
+        self.assertEqual(get_variant_weights([inherited.pk]), {inherited.pk: 250})
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.product_type = ProductType.objects.create(name='Type', slug='type')
+        self.root = Category.objects.create(name='Root', slug='root')
+        self.child = Category.objects.create(name='Child', slug='child', parent=self.root)
+
+    def create_product(self, slug):
+        return Product.objects.create(product_type=self.product_type, category=self.child, name=slug, slug=slug)
+
+    def test_product_counts_follow_saves_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            get_category_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.create_product('a')
+            # Not applied before the transaction commits
+            self.assertEqual(get_category_tree().get(self.child.pk).product_count, 0)
+        self.assertEqual(get_category_tree().get(self.root.pk).subtree_product_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.is_active = False
+            product.save()
+        self.assertEqual(get_category_tree().get(self.child.pk).product_count, 0)
+
+    def test_rolled_back_changes_are_not_applied(self):
+        get_category_tree()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.create_product('a')
+            Category.objects.create(name='Other', slug='other')
+        self.assertTrue(callbacks)
+        # Callbacks are dropped on rollback, the cached tree must be unchanged
+        tree = get_category_tree()
+        self.assertEqual(tree.get(self.child.pk).product_count, 0)
+        self.assertEqual(len(tree.nodes), 2)
+
+    def test_category_changes_invalidate_the_tree(self):
+        get_category_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Other', slug='other')
+        self.assertEqual(len(get_category_tree().nodes), 3)
+
+    def test_media_path_migration_invalidates_the_tree(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, 'product/categories'))
+        with open(os.path.join(media_root, 'product/categories/root.png'), 'wb') as file:
+            file.write(b'image')
+        Category.objects.filter(pk=self.root.pk).update(
+            background_image='product/categories/root.png', updated_at=timezone.now() - timedelta(days=1)
+        )
+        get_category_tree()
+
+        with self.settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks(execute=True):
+            call_command('migrate_media_paths', stdout=io.StringIO())
+        root = Category.objects.get(pk=self.root.pk)
+        self.assertNotEqual(root.background_image.name, 'product/categories/root.png')
+        self.assertEqual(get_category_tree().get(self.root.pk).background_image, root.background_image.name)
+        self.assertGreater(root.updated_at, timezone.now() - timedelta(minutes=1))
+
+
+class ProductListingTests(TestCase):
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        category = Category.objects.create(name='Category', slug='category')
+        self.products = []
+        for index in range(5):
+            product = Product.objects.create(
+                product_type=product_type, category=category, name=f'Product {index}', slug=f'product-{index}'
+            )
+            ProductMedia.objects.create(product=product, media_type=ProductMediaTypes.VIDEO, external_url='https://v')
+            ProductMedia.objects.create(product=product, image=f'products/{index}-first.jpg')
+            ProductMedia.objects.create(product=product, image=f'products/{index}-second.jpg')
+            self.products.append(product)
+        Product.objects.create(product_type=product_type, name='No media', slug='no-media')
+
+    def test_for_listing_query_count(self):
+        with self.assertNumQueries(2):
+            products = list(Product.objects.for_listing().order_by('pk'))
+            images = [product.get_first_image() for product in products]
+            [(product.product_type.name, product.category and product.category.name) for product in products]
+        self.assertEqual(len(products), 6)
+        self.assertEqual([image.image.name for image in images[:5]], [f'products/{index}-first.jpg' for index in range(5)])
+        self.assertIsNone(images[5])
+
+    def test_first_image_matches_unprefetched(self):
+        for product in Product.objects.for_listing():
+            expected = Product.objects.get(pk=product.pk).get_first_image()
+            self.assertEqual(product.get_first_image(), expected)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('product:product-list')
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.product_ids = [
+            Product.objects.create(product_type=product_type, name=f'P{index}', slug=f'p{index}').pk
+            for index in range(7)
+        ]
+        Product.objects.create(product_type=product_type, name='Inactive', slug='inactive', is_active=False)
+        # Products 1-4 share a timestamp, the id breaks the tie
+        now = timezone.now()
+        for index, product_id in enumerate(self.product_ids):
+            created_at = now if 1 <= index <= 4 else now + timedelta(seconds=index - 2)
+            Product.objects.filter(pk=product_id).update(created_at=created_at)
+
+    def walk(self, page_size):
+        ids, pages, url = [], 0, f'{self.url}?page_size={page_size}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [product['id'] for product in response.data['results']]
+            pages += 1
+            url = response.data['next']
+        return ids, pages
+
+    def expected_order(self):
+        return list(
+            Product.objects.filter(is_active=True).order_by('-created_at', '-pk').values_list('pk', flat=True)
+        )
+
+    def test_benchmark_command_runs(self):
+        out = io.StringIO()
+        call_command('benchmark_catalog_pagination', page_size=2, depths='1,3,9', repeat=1, stdout=out)
+        # 7 products: page 9 does not exist and is skipped
+        self.assertEqual([line.split()[0] for line in out.getvalue().splitlines()[2:4]], ['1', '3'])
+
+    def test_pages_cover_every_row_once_across_ties(self):
+        for page_size in (1, 2, 3, 6):
+            with self.subTest(page_size=page_size):
+                ids, _pages = self.walk(page_size)
+                self.assertEqual(ids, self.expected_order())
+
+    def test_full_last_page_has_no_next_page(self):
+        ids, pages = self.walk(7)
+        self.assertEqual(pages, 1)
+        self.assertEqual(len(ids), 7)
+
+    def test_short_last_page(self):
+        ids, pages = self.walk(3)
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids[-1:], self.expected_order()[-1:])
+
+    def test_page_query_count(self):
+        response = self.client.get(f'{self.url}?page_size=2')
+        # ETag aggregate and the page itself, whatever the page
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(f'{self.url}?cursor=not-a-cursor').status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product_type = ProductType.objects.create(name='Type', slug='type')
+        self.category = Category.objects.create(name='Category', slug='category')
+        self.product = Product.objects.create(
+            product_type=self.product_type, category=self.category, name='Product', slug='product'
+        )
+        self.urls = [
+            reverse('product:product-list'),
+            f"{reverse('product:product-list')}?category={self.category.pk}",
+            reverse('product:product-detail', args=['product']),
+        ]
+
+    def assert_change_changes_etags(self, change):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        for url, etag in zip(self.urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etags_follow_category_changes(self):
+        self.category.name = 'Renamed'
+        self.assert_change_changes_etags(self.category.save)
+
+    def test_etags_follow_product_type_changes(self):
+        self.product_type.name = 'Renamed'
+        self.assert_change_changes_etags(self.product_type.save)
+
+    def test_etags_follow_media_changes(self):
+        self.assert_change_changes_etags(
+            lambda: ProductMedia.objects.create(product=self.product, image='product/products/a.png')
+        )
+        media = ProductMedia.objects.create(product=self.product, image='product/products/b.png')
+        self.assert_change_changes_etags(lambda: ProductMedia.move([media], [0]))
+        self.assert_change_changes_etags(media.delete)
+
+
+class SortableModelTests(TestCase):
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.product = Product.objects.create(product_type=product_type, name='Tea', slug='tea')
+        self.media = [
+            ProductMedia.objects.create(product=self.product, image=f'products/{index}.jpg') for index in range(4)
+        ]
+
+    def ranks(self, product=None):
+        return list(ProductMedia.objects.filter(product=product or self.product).values_list('pk', 'sort_order'))
+
+    def test_new_items_are_spaced_by_the_gap(self):
+        self.assertEqual([rank for _pk, rank in self.ranks()], [0, 1024, 2048, 3072])
+
+    def test_move_only_updates_moved_items(self):
+        first, second, third, fourth = self.media
+        ProductMedia.move([fourth], [0])
+        self.assertEqual(self.ranks(), [(fourth.pk, -1024), (first.pk, 0), (second.pk, 1024), (third.pk, 2048)])
+        ProductMedia.move([first], [2])
+        self.assertEqual(self.ranks(), [(fourth.pk, -1024), (second.pk, 1024), (first.pk, 1536), (third.pk, 2048)])
+        self.assertEqual(first.sort_order, 1536)
+
+    def test_move_rebalances_when_there_is_no_room(self):
+        for rank, media in enumerate(self.media):
+            ProductMedia.objects.filter(pk=media.pk).update(sort_order=rank)
+        first, second, third, fourth = self.media
+        ProductMedia.move([fourth], [1])
+        self.assertEqual(self.ranks(), [(first.pk, 0), (fourth.pk, 1024), (second.pk, 2048), (third.pk, 3072)])
+
+    def test_move_rejects_items_of_another_ordering(self):
+        other = Product.objects.create(product_type=self.product.product_type, name='Coffee', slug='coffee')
+        foreign = ProductMedia.objects.create(product=other, image='products/coffee.jpg')
+        before = self.ranks()
+        with self.assertRaises(ValueError):
+            ProductMedia.move([self.media[0], foreign], [3, 0])
+        with self.assertRaises(ValueError):
+            ProductMedia.move(self.media[:2], [1])
+        self.assertEqual(self.ranks(), before)
+        self.assertEqual(self.ranks(other), [(foreign.pk, 0)])
+
+    def test_gapped_delete_leaves_other_items_alone(self):
+        self.media[1].delete()
+        self.assertEqual(
+            self.ranks(), [(self.media[0].pk, 0), (self.media[2].pk, 2048), (self.media[3].pk, 3072)]
+        )
+
+    def test_delete_closes_the_gap_without_spacing(self):
+        ProductMedia.objects.all().delete()
+        with mock.patch.object(ProductMedia, 'sort_order_gap', 1):
+            media = [ProductMedia.objects.create(product=self.product, image=f'{index}.jpg') for index in range(3)]
+            media[0].delete()
+        self.assertEqual(self.ranks(), [(media[1].pk, 0), (media[2].pk, 1)])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        with self.captureOnCommitCallbacks(execute=True):
+            # Inactive products rank first: exact name matches, lower ids
+            self.inactive = [
+                Product.objects.create(product_type=product_type, name='Widget', slug=f'off-{index}', is_active=False)
+                for index in range(3)
+            ]
+            self.active = [
+                Product.objects.create(product_type=product_type, name='Widgets', slug=f'on-{index}')
+                for index in range(3)
+            ]
+        search_index.loaded = False
+
+    def test_limit_counts_active_products_only(self):
+        response = self.client.get(reverse('product:product-search'), {'q': 'widget', 'limit': 2})
+        self.assertEqual([product['id'] for product in response.data['results']], [product.pk for product in self.active[:2]])
+
+    def test_deletions_reach_other_processes(self):
+        # A second index stands for another worker, it only sees the database
+        other = SearchIndex()
+        other.refresh()
+        self.assertIn(self.active[0].pk, dict(other.search('widgets')))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.active[0].delete()
+        other.refresh()
+        self.assertNotIn(self.active[0].pk, dict(other.search('widgets')))
+        self.assertIn(self.active[1].pk, dict(other.search('widgets')))
+
+    def test_documents_committed_late_are_picked_up(self):
+        other = SearchIndex()
+        other.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            late = Product.objects.create(product_type=self.active[0].product_type, name='Gadget', slug='late')
+        ProductSearchDocument.objects.filter(product=late).update(updated_at=other.watermark - timedelta(seconds=10))
+        other.refresh()
+        self.assertIn(late.pk, dict(other.search('gadget')))
+
+
+class BarcodeScanTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(email='staff@example.com', username='staff', is_employee=True))
+        self.url = reverse('product:barcode-scan')
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        product = Product.objects.create(product_type=product_type, name='Product', slug='product')
+        self.variants = ProductVariant.objects.bulk_create_with_codes([
+            {'product': product, 'sku': f'SKU-{index}', 'selling_price': index + 1} for index in range(3)
+        ])
+        barcode_lookup.loaded = False
+
+    def test_scan_resolves_every_kind_of_code(self):
+        variant = self.variants[0]
+        codes = [variant.upc_code, variant.ean13_code, variant.sku, 'unknown']
+        response = self.client.post(self.url, {'codes': codes}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual({results[code]['variant_id'] for code in codes[:3]}, {variant.pk})
+        self.assertIsNone(results['unknown'])
+
+    def test_loaded_lookup_costs_no_query(self):
+        barcode_lookup.refresh()
+        with self.assertNumQueries(0):
+            barcode_lookup.lookup_many([variant.upc_code for variant in self.variants])
+
+    def test_invalid_bodies_are_rejected(self):
+        for body in (['123'], {'codes': 'abc'}, {'codes': [1, None]}, {'codes': ['1'] * 1001}, {}):
+            with self.subTest(body=str(body)[:30]):
+                self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+
+    def test_deletions_reach_other_processes(self):
+        # A second lookup stands for another worker, it only sees the database
+        other = BarcodeLookup()
+        other.refresh()
+        variant = self.variants[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.delete()
+        other.refresh()
+        self.assertIsNone(other.lookup_many([variant.upc_code])[variant.upc_code])
+        self.assertIsNotNone(other.lookup_many([self.variants[1].upc_code])[self.variants[1].upc_code])
+
+
+    def test_rows_committed_late_are_picked_up(self):
+        other = BarcodeLookup()
+        other.refresh()
+        # Stamped before the newest row the lookup read, but committed after its refresh
+        late = ProductVariant.objects.bulk_create_with_codes([
+            {'product': self.variants[0].product, 'sku': 'LATE', 'selling_price': 1}
+        ])[0]
+        ProductVariant.objects.filter(pk=late.pk).update(updated_at=other.watermark - timedelta(seconds=10))
+        other.refresh()
+        self.assertEqual(other.lookup_many(['LATE'])['LATE']['variant_id'], late.pk)
+
+
+class ProductBrowseTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('product:product-browse')
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.products = [
+            Product.objects.create(product_type=product_type, name=f'P{index}', slug=f'p{index}') for index in range(3)
+        ]
+        # Start every test from a fresh process-local index
+        patcher = mock.patch.multiple(facets, _facet_index=None, _facet_index_version=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def result_ids(self):
+        return {product['id'] for product in self.client.get(self.url).data['results']}
+
+    def test_deactivated_products_are_hidden_from_a_stale_index(self):
+        self.result_ids()
+        # A write without signals: the index still lists the product
+        Product.objects.filter(pk=self.products[0].pk).update(is_active=False)
+        self.assertEqual(self.result_ids(), {product.pk for product in self.products[1:]})
+
+    def assert_pages_continue_after_a_removed_product(self):
+        with mock.patch('product.views.ProductBrowseView.page_size', 2):
+            first = self.client.get(self.url).data
+            self.assertEqual([product['id'] for product in first['results']], [self.products[2].pk, self.products[1].pk])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.products[1].delete()
+            second = self.client.get(self.url, {'after': first['after']}).data
+        self.assertEqual([product['id'] for product in second['results']], [self.products[0].pk])
+        self.assertIsNone(second['after'])
+
+    def test_pages_continue_after_a_removed_product(self):
+        # The rebuilt index no longer knows the last product of the first page
+        with mock.patch.object(facets, 'FACET_INDEX_MIN_REBUILD_INTERVAL', 0):
+            self.assert_pages_continue_after_a_removed_product()
+
+    def test_pages_continue_after_a_removed_product_without_numpy(self):
+        with mock.patch('product.views.np', None):
+            self.assert_pages_continue_after_a_removed_product()
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'after': '12'}).status_code, 400)
+
+    def test_changes_reach_other_processes_through_the_shared_version(self):
+        self.assertEqual(len(self.result_ids()), 3)
+        index = facets.get_facet_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].is_active = False
+            self.products[0].save()
+        # Another process would also see a new version once its check interval passed
+        with mock.patch.object(facets, 'FACET_INDEX_MIN_REBUILD_INTERVAL', 0):
+            self.assertIsNot(facets.get_facet_index(), index)
+            self.assertEqual(self.client.get(self.url).data['count'], 2)
+
+
+class PriceSummaryTests(TestCase):
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.product = Product.objects.create(product_type=product_type, name='Product', slug='product')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.variant = ProductVariant.objects.create(product=self.product, sku='A', selling_price=10)
+
+    def test_summary_update_bumps_updated_at(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.min_selling_price, 10)
+        Product.objects.filter(pk=self.product.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        etag = APIClient().get(reverse('product:product-list'))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.variant.selling_price = 5
+            self.variant.save()
+        updated = Product.objects.get(pk=self.product.pk)
+        self.assertEqual(updated.min_selling_price, 5)
+        self.assertGreater(updated.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertNotEqual(APIClient().get(reverse('product:product-list'))['ETag'], etag)
+
+
+class ProductImporterTests(TestCase):
+    row = {
+        'product_slug': 'tea', 'product_name': 'Tea', 'product_type': 'drinks', 'sku': 'TEA-1',
+        'selling_price': '10',
+    }
+
+    def test_reimport_bumps_updated_at(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImporter().run([(1, self.row)])
+        yesterday = timezone.now() - timedelta(days=1)
+        Product.objects.update(updated_at=yesterday)
+        ProductVariant.objects.update(updated_at=yesterday)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = ProductImporter().run([(1, dict(self.row, product_name='Green tea', selling_price='12'))])
+        self.assertEqual(report['imported'], 1)
+        product = Product.objects.get(slug='tea')
+        variant = ProductVariant.objects.get(sku='TEA-1')
+        self.assertEqual((product.name, variant.selling_price), ('Green tea', 12))
+        self.assertGreater(product.updated_at, yesterday + timedelta(hours=1))
+        self.assertGreater(variant.updated_at, yesterday + timedelta(hours=1))
+
+    def test_failed_batch_forgets_created_categories(self):
+        rows = [(line, dict(self.row, sku=f'TEA-{line}', category='tea')) for line in (1, 2, 3)]
+        rejected = []
+        bulk_create = Product.objects.bulk_create
+        calls = []
+
+        def fail_first_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise DatabaseError('boom')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(Product.objects, 'bulk_create', side_effect=fail_first_batch):
+            report = ProductImporter(batch_size=1, rejected=lambda *args: rejected.append(args)).run(rows)
+        self.assertEqual([line for line, *_ in rejected], [1])
+        self.assertEqual((report['imported'], report['products']), (2, 2))
+        self.assertEqual(Product.objects.get(slug='tea').category.slug, 'tea')
+
+    def test_too_long_values_are_rejected(self):
+        rejected = []
+        report = ProductImporter(rejected=lambda *args: rejected.append(args)).run([(1, dict(self.row, sku='S' * 65))])
+        self.assertEqual(report['rejected'], 1)
+        self.assertIn('sku is longer than 64', rejected[0][1])
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        self.categories = [Category.objects.create(name=slug, slug=slug) for slug in ('tea', 'coffee')]
+        self.product = Product.objects.create(
+            product_type=product_type, category=self.categories[0], name='Tea', slug='tea'
+        )
+        self.variant = ProductVariant.objects.create(product=self.product, sku='TEA-1', selling_price=10)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, since=None):
+        path = os.path.join(self.directory, 'delta.bin' if since else 'full.bin')
+        with open(path, 'wb') as out:
+            write_snapshot(out, since=since)
+        snapshot = CatalogSnapshot(path)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_full_snapshot(self):
+        snapshot = self.write()
+        self.assertFalse(snapshot.is_delta)
+        self.assertEqual(snapshot.variant_by_code('TEA-1')['product_id'], self.product.pk)
+        self.assertEqual(len(snapshot.tables['categories']), 2)
+        self.assertNotIn('category_ids', snapshot.tables)
+
+    def test_delta_lists_live_ids(self):
+        since = timezone.now()
+        self.categories[1].delete()
+        snapshot = self.write(since)
+        self.assertTrue(snapshot.is_delta)
+        self.assertEqual(len(snapshot.tables['products']), 0)
+        for table, ids in (
+            ('category_ids', [self.categories[0].pk]),
+            ('product_ids', [self.product.pk]),
+            ('variant_ids', [self.variant.pk]),
+        ):
+            with self.subTest(table=table):
+                ids_table = snapshot.tables[table]
+                self.assertEqual([ids_table.value('id', index) for index in range(len(ids_table))], ids)
+
+
+class WarmThumbnailsTests(TestCase):
+    def test_shared_images_are_listed_once(self):
+        product_type = ProductType.objects.create(name='Type', slug='type')
+        product = Product.objects.create(product_type=product_type, name='Product', slug='product')
+        for _ in range(3):
+            ProductMedia.objects.create(product=product, image='product/products/shared.png')
+        self.assertEqual(list(warm_thumbnails.Command().image_names()), ['product/products/shared.png'])
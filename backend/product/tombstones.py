@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+# Tombstones are kept this long; an index that did not refresh for longer reloads everything
+TOMBSTONE_RETENTION = timedelta(days=1)
+# Re-read tombstones and updated_at watermarks this far back, for clock skew between
+# hosts and rows committed after a newer row was already read
+TOMBSTONE_OVERLAP = timedelta(minutes=1)
+
+
+def record_deletion(object_type, object_id):
+    """Called from post_delete, inside the deleting transaction"""
+    from product.models import CatalogTombstone
+
+    CatalogTombstone.objects.create(object_type=object_type, object_id=object_id)
+
+
+def deleted_ids_since(object_type, since):
+    """Ids of the objects of `object_type` deleted since `since`"""
+    from product.models import CatalogTombstone
+
+    return set(
+        CatalogTombstone.objects.filter(object_type=object_type, deleted_at__gte=since - TOMBSTONE_OVERLAP)
+        .values_list("object_id", flat=True)
+    )
+
+
+def prune_tombstones():
+    from product.models import CatalogTombstone
+
+    CatalogTombstone.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()
+
+
+class TombstoneWatcher:
+    """
+    Tells an in-memory index what was deleted since it last looked, or that
+    it has to reload everything because the tombstones may be pruned.
+    """
+
+    def __init__(self, object_type):
+        self.object_type = object_type
+        self.checked_at = None
+
+    def start(self):
+        """Call before a full load, tombstones written from then on are seen by the next check"""
+        self.checked_at = timezone.now()
+
+    def needs_reload(self):
+        return self.checked_at is None or timezone.now() - self.checked_at > TOMBSTONE_RETENTION - TOMBSTONE_OVERLAP
+
+    def deleted_ids(self):
+        now = timezone.now()
+        deleted = deleted_ids_since(self.object_type, self.checked_at)
+        self.checked_at = now
+        return deleted
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from product import views
+
+app_name = 'product'
+
+urlpatterns = [
+    path('categories/', views.CategoryTreeView.as_view(), name='category-tree'),
+    path('products/', views.ProductListView.as_view(), name='product-list'),
+    path('browse/', views.ProductBrowseView.as_view(), name='product-browse'),
+    path('search/', views.ProductSearchView.as_view(), name='product-search'),
+    path('scan/', views.BarcodeScanView.as_view(), name='barcode-scan'),
+    path('products/<str:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('products/<str:slug>/variants/', views.ProductVariantListView.as_view(), name='product-variant-list'),
+]
@@ -1,5 +1,10 @@
 import random
-from typing import Tuple
+from typing import Iterable, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def generate_product_code() -> str:
@@ -11,6 +16,22 @@ def generate_product_code() -> str:
     """
     return str(random.randint(10000, 99999))  # 5 haneli rastgele sayı
 
+def check_digit_weights(length: int) -> Tuple[int, ...]:
+    """
+    Weights of the digits before the check digit of a UPC or EAN-13 code.
+
+    They are counted from the right: the digit next to the check digit
+    weighs 3, the one before it 1, and so on. The same weights then serve
+    11-digit UPC and 12-digit EAN-13 payloads.
+
+    Args:
+        length (int): The number of digits without the check digit.
+
+    Returns:
+        Tuple[int, ...]: One weight per digit, left to right.
+    """
+    return tuple(3 if (length - index) % 2 else 1 for index in range(length))
+
 def calculate_check_digit(code: str) -> int:
     """
     Calculate the check digit for UPC or EAN-13 codes.
@@ -21,15 +42,83 @@ def calculate_check_digit(code: str) -> int:
     Returns:
         int: The calculated check digit.
     """
-
-    odd_sum = sum(int(code[i]) for i in range(0, len(code), 2))
-    even_sum = sum(int(code[i]) for i in range(1, len(code), 2)) * 3
-    total_sum = odd_sum + even_sum
+    total_sum = sum(int(digit) * weight for digit, weight in zip(code, check_digit_weights(len(code))))
 
     check_digit = (10 - (total_sum % 10)) % 10
     
     return check_digit
 
+def _digit_rows(codes):
+    """
+    Group codes by length and yield (indexes, digits) where digits is a
+    (n, length) matrix. Non-digit characters end up outside 0-9.
+    """
+    lengths = np.char.str_len(codes)
+    for length in np.unique(lengths):
+        if length == 0:
+            continue
+        indexes = np.flatnonzero(lengths == length)
+        # str arrays are UCS4, so every character is one uint32 code point
+        points = codes[indexes].astype(f"U{length}").view(np.uint32).reshape(-1, length)
+        yield indexes, points.astype(np.int64) - ord("0")
+
+def _check_digits_of(digits):
+    """Vectorized calculate_check_digit over the rows of a digit matrix"""
+    weights = np.array(check_digit_weights(digits.shape[1]), dtype=np.int64)
+    return (10 - (digits @ weights) % 10) % 10
+
+def calculate_check_digits(codes: Iterable[str]):
+    """
+    Calculate check digits for many UPC or EAN-13 codes at once.
+
+    Uses the same weighting as calculate_check_digit, codes may have mixed
+    lengths.
+
+    Args:
+        codes (Iterable[str]): Codes without their check digit, a list or NumPy array.
+
+    Returns:
+        numpy.ndarray: The check digit per code, -1 for codes that are not all digits.
+        A list is returned when NumPy is not installed.
+    """
+    if np is None:
+        return [calculate_check_digit(code) if code.isascii() and code.isdigit() else -1 for code in codes]
+
+    codes = np.asarray(codes, dtype=str)
+    result = np.full(len(codes), -1, dtype=np.int8)
+    for indexes, digits in _digit_rows(codes):
+        is_digit = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        result[indexes[is_digit]] = _check_digits_of(digits[is_digit])
+    return result
+
+def verify_check_digits(codes: Iterable[str], length: int):
+    """
+    Verify many complete UPC or EAN-13 codes at once.
+
+    Args:
+        codes (Iterable[str]): Codes including their check digit, a list or NumPy array.
+        length (int): The expected length, 12 for UPC and 13 for EAN-13.
+
+    Returns:
+        numpy.ndarray: A boolean per code, True when it has the expected length,
+        only digits and a matching check digit. A list is returned when NumPy
+        is not installed.
+    """
+    if np is None:
+        return [
+            len(code) == length and code.isascii() and code.isdigit() and calculate_check_digit(code[:-1]) == int(code[-1])
+            for code in codes
+        ]
+
+    codes = np.asarray(codes, dtype=str)
+    result = np.zeros(len(codes), dtype=bool)
+    for indexes, digits in _digit_rows(codes):
+        if digits.shape[1] != length:
+            continue
+        is_digit = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        result[indexes] = is_digit & (_check_digits_of(digits[:, :-1]) == digits[:, -1])
+    return result
+
 def generate_upc_ean13(product_code: str, producer_code: str = '123456', country_code: str = '869') -> Tuple[str, str]:
     """
     Generate UPC and EAN-13 codes based on producer and product codes.
@@ -89,5 +178,47 @@ def generate_ean13_code(product_code: str, producer_code: str = '123456', countr
 
     return ean13_code
 
+def get_serial_width(producer_code: str, country_code: str = '869') -> int:
+    """
+    Return how many digits are left for the item serial once the producer
+    (and for EAN-13 the country) prefix is placed.
+
+    Args:
+        producer_code (str): The producer code.
+        country_code (str): The country code (default is '869' for Turkey).
+
+    Returns:
+        int: The number of serial digits that fit both UPC and EAN-13.
+    """
+    upc_width = 11 - len(producer_code)
+    ean13_width = 12 - len(country_code) - len(producer_code)
+    return min(upc_width, ean13_width)
+
+def generate_barcodes(serial: int, producer_code: str, country_code: str = '869') -> Tuple[str, str, str]:
+    """
+    Generate variant, UPC and EAN-13 codes for an allocated item serial.
+
+    Unlike generate_upc_ean13, the whole serial is kept in both barcodes so
+    unique serials always give unique codes.
+
+    Args:
+        serial (int): The item serial, smaller than 10 ** get_serial_width().
+        producer_code (str): The producer code.
+        country_code (str): The country code (default is '869' for Turkey).
+
+    Returns:
+        Tuple[str, str, str]: The variant code, UPC code and EAN-13 code.
+    """
+    width = get_serial_width(producer_code, country_code)
+    variant_code = f"{producer_code}{serial:0{width}d}"
+
+    upc_code_without_check = f"{producer_code}{serial:0{11 - len(producer_code)}d}"
+    ean13_code_without_check = f"{country_code}{producer_code}{serial:0{width}d}"
+
+    upc_code = f"{upc_code_without_check}{calculate_check_digit(upc_code_without_check)}"
+    ean13_code = f"{ean13_code_without_check}{calculate_check_digit(ean13_code_without_check)}"
+
+    return variant_code, upc_code, ean13_code
+
 # upc, ean13 = generate_upc_ean13("78901")
 # upc, ean13 = generate_upc_ean13("78901", "654321")
\ No newline at end of file
@@ -1,9 +1,22 @@
 from django.core.exceptions import ValidationError
 
-from django.core.exceptions import ValidationError
+from product.utils import verify_check_digits
 
 def validate_upc(value):
     if len(value) != 12:
         raise ValidationError("UPC must be 12 digits long.")
     if not value.isdigit():
-        raise ValidationError("UPC must contain only numbers.")
\ No newline at end of file
+        raise ValidationError("UPC must contain only numbers.")
+
+def validate_upc_many(values):
+    """
+    Batch companion of validate_upc for catalog audits. Instead of raising,
+    return a boolean per value: 12 digits with a valid check digit.
+    """
+    return verify_check_digits(values, length=12)
+
+def validate_ean13_many(values):
+    """
+    Return a boolean per value: 13 digits with a valid check digit.
+    """
+    return verify_check_digits(values, length=13)
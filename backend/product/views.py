@@ -1,3 +1,226 @@
-from django.shortcuts import render
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from account.permissions import IsEmployee
+from core.conditional import conditional_get, get_queryset_validators, make_etag
+from core.pagination import KeysetPagination, decode_cursor, encode_cursor
+from product.barcode_lookup import barcode_lookup
+from product.category_tree import get_category_tree
+from product.facets import get_facet_index, np
+from product.filters import ProductFacetFilterSet
+from product.models import Product, ProductVariant
+from product.search import search_product_ids
+from product.serializers import (
+    BarcodeScanSerializer,
+    ProductDetailSerializer,
+    ProductListSerializer,
+    ProductVariantSerializer,
+    first_image_subquery,
+)
+
+# Rows whose changes show in a serialized product: renaming its category or
+# type or repricing its default variant must change the ETag too. Media
+# changes bump Product.updated_at (see signals).
+PRODUCT_TIMESTAMP_FIELDS = (
+    'updated_at', 'default_variant__updated_at', 'category__updated_at', 'product_type__updated_at',
+)
+
+
+class ProductListView(APIView):
+    """
+    Active products, newest first, with keyset pagination.
+    ?category=<id> limits the list to a category subtree.
+    """
+    permission_classes = (AllowAny,)
+    pagination_class = KeysetPagination
+    serializer_class = ProductListSerializer
+
+    def get_base_queryset(self):
+        queryset = Product.objects.filter(is_active=True)
+        category_id = self.request.query_params.get('category')
+        if category_id:
+            tree = get_category_tree()
+            try:
+                category_ids = tree.get_descendant_ids(int(category_id))
+            except (KeyError, ValueError):
+                return queryset.none()
+            queryset = queryset.filter(category_id__in=category_ids)
+        return queryset
+
+    def get_queryset(self):
+        return self.get_base_queryset().annotate(first_image=first_image_subquery()).values(*self.serializer_class.fields)
+
+    def get_validators(self, request):
+        return get_queryset_validators(
+            self.get_base_queryset(), request.get_full_path(),
+            timestamp_fields=PRODUCT_TIMESTAMP_FIELDS,
+        )
+
+    @conditional_get
+    def get(self, request):
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+        return paginator.get_paginated_response([self.serializer_class.to_representation(row) for row in rows])
+
+
+class ProductBrowseView(APIView):
+    """
+    A page of active products plus facet counts for category, product type,
+    price and weight in one response. Filters are those of
+    ProductFacetFilterSet; ?after=<cursor> continues from the last page.
+    """
+    permission_classes = (AllowAny,)
+    serializer_class = ProductListSerializer
+    page_size = 20
+
+    def get(self, request):
+        filterset = ProductFacetFilterSet(request.query_params, queryset=Product.objects.filter(is_active=True))
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        try:
+            after = decode_cursor(request.query_params['after']) if 'after' in request.query_params else None
+        except ValueError:
+            raise ValidationError({'after': 'Invalid cursor.'})
+
+        if np is None:
+            # Without NumPy there is no facet index, list with the ORM only
+            queryset = filterset.qs.order_by('-created_at', '-pk')
+            if after is not None:
+                created_at, pk = after
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+            page = list(queryset.values_list('pk', 'created_at')[:self.page_size])
+            product_ids = [pk for pk, _created_at in page]
+            last_key = (page[-1][1], page[-1][0]) if len(page) == self.page_size else None
+            count, facets = None, None
+        else:
+            product_ids, count, facets, last_key = get_facet_index().search(
+                after=after, limit=self.page_size, **filterset.facet_params()
+            )
+
+        # The index can be a little behind, products deactivated since it was built are skipped
+        rows = {
+            row['id']: row
+            for row in Product.objects.filter(pk__in=product_ids, is_active=True)
+            .annotate(first_image=first_image_subquery())
+            .values(*self.serializer_class.fields)
+        }
+        results = [
+            self.serializer_class.to_representation(rows[product_id])
+            for product_id in product_ids if product_id in rows
+        ]
+        return Response({
+            'count': count,
+            'after': encode_cursor(*last_key) if last_key is not None else None,
+            'facets': facets,
+            'results': results,
+        })
+
+
+class ProductDetailView(APIView):
+    permission_classes = (AllowAny,)
+    serializer_class = ProductDetailSerializer
+
+    def get_base_queryset(self):
+        return Product.objects.filter(is_active=True, slug=self.kwargs['slug'])
+
+    def get_object(self):
+        queryset = (
+            self.get_base_queryset()
+            .annotate(first_image=first_image_subquery())
+            .values(*self.serializer_class.fields)
+        )
+        return get_object_or_404(queryset)
+
+    def get_validators(self, request, slug):
+        return get_queryset_validators(
+            self.get_base_queryset(), request.path,
+            timestamp_fields=PRODUCT_TIMESTAMP_FIELDS,
+        )
+
+    @conditional_get
+    def get(self, request, slug):
+        return Response(self.serializer_class.to_representation(self.get_object()))
+
+
+class ProductVariantListView(APIView):
+    """Variants of an active product, newest first, with keyset pagination"""
+    permission_classes = (AllowAny,)
+    pagination_class = KeysetPagination
+    serializer_class = ProductVariantSerializer
+
+    def get_base_queryset(self):
+        return ProductVariant.objects.filter(product__slug=self.kwargs['slug'], product__is_active=True)
+
+    def get_queryset(self):
+        return self.get_base_queryset().values(*self.serializer_class.fields)
+
+    def get_validators(self, request, slug):
+        return get_queryset_validators(self.get_base_queryset(), request.get_full_path())
+
+    @conditional_get
+    def get(self, request, slug):
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+        return paginator.get_paginated_response([self.serializer_class.to_representation(row) for row in rows])
+
+
+class CategoryTreeView(APIView):
+    """
+    The whole navigation tree with product counts, served from the cached
+    category tree. Its version is the ETag, so a 304 costs no query.
+    """
+    permission_classes = (AllowAny,)
+
+    def get_validators(self, request):
+        return make_etag('category-tree', get_category_tree().version), None
+
+    @conditional_get
+    def get(self, request):
+        return Response(get_category_tree().as_nested())
+
+
+class ProductSearchView(APIView):
+    """Ranked product search: ?q=<text>&limit=<n>"""
+    permission_classes = (AllowAny,)
+    serializer_class = ProductListSerializer
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        product_ids = search_product_ids(
+            request.query_params.get('q', ''), limit=limit, queryset=Product.objects.filter(is_active=True)
+        )
+
+        rows = {
+            row['id']: row
+            for row in Product.objects.filter(pk__in=product_ids, is_active=True)
+            .annotate(first_image=first_image_subquery())
+            .values(*self.serializer_class.fields)
+        }
+        return Response({
+            'results': [
+                self.serializer_class.to_representation(rows[product_id])
+                for product_id in product_ids if product_id in rows
+            ]
+        })
+
+
+class BarcodeScanView(APIView):
+    """
+    Resolve a batch of scanned UPC/EAN-13/SKU codes for warehouse staff.
+    POST {"codes": [...]} -> {"results": {code: {"variant_id", "selling_price"} or null}}
+    """
+    permission_classes = (IsEmployee,)
+
+    def post(self, request):
+        serializer = BarcodeScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': barcode_lookup.lookup_many(serializer.validated_data['codes'])})
@@ -0,0 +1,50 @@
+"""
+Shipping weights as plain floats in grams.
+
+MeasurementField stores the standard unit of Weight (grams) as a float, so
+weights can be resolved and summed in SQL without building a Weight per
+row; callers turn the result into a Weight only when they hand it out.
+"""
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Coalesce
+from measurement.measures import Weight
+
+
+def effective_weight_grams():
+    """A variant's weight, or its product's when it has none, in grams; for annotate()"""
+    return Coalesce(F("weight"), F("product__weight"), output_field=FloatField())
+
+
+def get_variant_weights(variant_ids):
+    """Variant id -> effective weight in grams (None when neither is set), with one query"""
+    from product.models import ProductVariant
+
+    return dict(
+        ProductVariant.objects.filter(pk__in=variant_ids).with_weight_grams().values_list("pk", "weight_grams")
+    )
+
+
+def basket_weight_grams(lines, weights=None):
+    """Total weight in grams of (variant id, quantity) pairs; variants without a weight count as 0"""
+    quantities = {}
+    for variant_id, quantity in lines:
+        quantities[variant_id] = quantities.get(variant_id, 0) + quantity
+    if weights is None:
+        weights = get_variant_weights(list(quantities))
+    return sum((weights.get(variant_id) or 0.0) * quantity for variant_id, quantity in quantities.items())
+
+
+def total_weight_grams(queryset, weight_field="weight_grams", quantity_field=None):
+    """
+    Sum a weight over a queryset in the database. `weight_field` may be an
+    annotation such as effective_weight_grams(); with `quantity_field` each
+    row is multiplied by its quantity.
+    """
+    weight = F(weight_field)
+    if quantity_field is not None:
+        weight = weight * F(quantity_field)
+    return queryset.aggregate(total=Coalesce(Sum(weight, output_field=FloatField()), 0.0))["total"]
+
+
+def to_weight(grams):
+    return Weight(g=grams) if grams is not None else None
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WorldConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'world'
+
+    def ready(self):
+        from world import signals
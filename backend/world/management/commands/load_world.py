@@ -0,0 +1,167 @@
+import csv
+import gzip
+import io
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from world.models import Country, Currency, Timezone
+from world.registry import world_registry
+
+COUNTRY_FIELDS = (
+    'name', 'iso3', 'iso2', 'numeric_code', 'phone_code', 'capital', 'tld',
+    'native', 'region', 'subregion', 'latitude', 'longitude', 'emoji', 'emojiU',
+)
+TIMEZONE_FIELDS = ('zoneName', 'gmtOffset', 'gmtOffsetName', 'abbreviation', 'tzName')
+
+
+def open_dump(path):
+    """Open a plain or gzip'd text file, gzip is detected from its magic bytes"""
+    raw = open(path, 'rb')
+    if raw.peek(2)[:2] == b'\x1f\x8b':
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def read_records(path, fmt):
+    """
+    Yield one dict per country. Records follow the countries dataset layout:
+    country fields, `currency`, `currency_name`, `currency_symbol` and a list
+    of `timezones` (JSON-encoded in CSV files).
+    """
+    with open_dump(path) as dump:
+        if fmt == 'json':
+            yield from json.load(dump)
+        elif fmt == 'ndjson':
+            for line in dump:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(dump):
+                row['timezones'] = json.loads(row.get('timezones') or '[]')
+                yield row
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return 'json'
+
+
+def upsert(model, key, rows, fields):
+    """
+    Create or update `rows` (natural key -> field dict) with one bulk insert
+    and one bulk update. Returns ({key: instance}, created, updated).
+    """
+    existing = {getattr(obj, key): obj for obj in model.objects.all()}
+    to_create, to_update = [], []
+    for natural_key, values in rows.items():
+        obj = existing.get(natural_key)
+        if obj is None:
+            to_create.append(model(**values))
+        elif any(getattr(obj, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(obj, field, values[field])
+            to_update.append(obj)
+
+    if to_create:
+        model.objects.bulk_create(to_create)
+        # Not every backend returns primary keys from a bulk insert
+        existing = {getattr(obj, key): obj for obj in model.objects.all()}
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+    return existing, len(to_create), len(to_update)
+
+
+class Command(BaseCommand):
+    help = 'Load countries, currencies and timezones from a (gzip\'d) JSON, NDJSON or CSV dump'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the dump, may be gzip compressed')
+        parser.add_argument('--format', choices=('json', 'ndjson', 'csv'), help='Defaults to the file extension')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        currencies, timezones, countries, country_timezones = {}, {}, {}, {}
+        try:
+            for record in read_records(path, fmt):
+                iso2 = record['iso2']
+                if record.get('currency'):
+                    currencies[record['currency']] = {
+                        'currency_code': record['currency'],
+                        'currency_name': record.get('currency_name') or '',
+                        'currency_symbol': record.get('currency_symbol') or '',
+                    }
+                for timezone in record.get('timezones') or []:
+                    timezones[timezone['zoneName']] = {field: str(timezone.get(field) or '') for field in TIMEZONE_FIELDS}
+
+                values = {field: str(record.get(field) or '') for field in COUNTRY_FIELDS}
+                values['phone_code'] = str(record.get('phone_code') or record.get('phonecode') or '')
+                values['latitude'] = Decimal(str(record.get('latitude') or 0))
+                values['longitude'] = Decimal(str(record.get('longitude') or 0))
+                values['currency_code'] = record.get('currency') or None
+                countries[iso2] = values
+                country_timezones[iso2] = {timezone['zoneName'] for timezone in record.get('timezones') or []}
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+        read_at = time.perf_counter()
+
+        with transaction.atomic():
+            currency_map, currencies_created, currencies_updated = upsert(
+                Currency, 'currency_code', currencies, ('currency_name', 'currency_symbol')
+            )
+            timezone_map, timezones_created, timezones_updated = upsert(
+                Timezone, 'zoneName', timezones, TIMEZONE_FIELDS[1:]
+            )
+
+            for values in countries.values():
+                currency = currency_map.get(values.pop('currency_code'))
+                values['currency_id'] = currency.pk if currency else None
+            country_map, countries_created, countries_updated = upsert(
+                Country, 'iso2', countries, COUNTRY_FIELDS[:2] + COUNTRY_FIELDS[3:] + ('currency_id',)
+            )
+
+            # Country.timezones through-table: add missing pairs, drop stale ones
+            Through = Country.timezones.through
+            wanted = {
+                (country_map[iso2].pk, timezone_map[zone_name].pk)
+                for iso2, zone_names in country_timezones.items()
+                for zone_name in zone_names
+            }
+            current = dict(
+                ((country_id, timezone_id), pk)
+                for pk, country_id, timezone_id in Through.objects.filter(
+                    country_id__in=[country_map[iso2].pk for iso2 in countries]
+                ).values_list('pk', 'country_id', 'timezone_id')
+            )
+            stale = [pk for pair, pk in current.items() if pair not in wanted]
+            missing = [
+                Through(country_id=country_id, timezone_id=timezone_id)
+                for country_id, timezone_id in wanted - current.keys()
+            ]
+            Through.objects.filter(pk__in=stale).delete()
+            Through.objects.bulk_create(missing, ignore_conflicts=True)
+
+            # Bulk operations don't send signals
+            transaction.on_commit(world_registry.invalidate)
+
+        finished = time.perf_counter()
+        self.stdout.write(
+            f'Currencies: {currencies_created} created, {currencies_updated} updated\n'
+            f'Timezones: {timezones_created} created, {timezones_updated} updated\n'
+            f'Countries: {countries_created} created, {countries_updated} updated\n'
+            f'Country timezones: {len(missing)} added, {len(stale)} removed'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'World data loaded in {finished - started:.3f}s '
+            f'(read {read_at - started:.3f}s, write {finished - read_at:.3f}s)'
+        ))
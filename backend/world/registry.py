@@ -0,0 +1,153 @@
+import threading
+import time
+from uuid import uuid4
+
+from django.core.cache import caches
+
+from core import settings
+
+WORLD_REGISTRY_CACHE_KEY = "world:registry"
+WORLD_REGISTRY_VERSION_KEY = "world:registry:version"
+
+
+class WorldData:
+    """All countries, currencies and timezones indexed for O(1) lookups"""
+
+    def __init__(self, countries, currencies, timezones):
+        self.countries = {country.pk: country for country in countries}
+        self.countries_by_iso2 = {country.iso2.upper(): country for country in countries}
+        self.countries_by_iso3 = {country.iso3.upper(): country for country in countries}
+        self.countries_by_numeric_code = {country.numeric_code: country for country in countries}
+        self.countries_by_phone_code = {}
+        for country in countries:
+            phone_code = normalize_phone_code(country.phone_code)
+            self.countries_by_phone_code.setdefault(phone_code, []).append(country)
+
+        self.currencies = {currency.pk: currency for currency in currencies}
+        self.currencies_by_code = {currency.currency_code.upper(): currency for currency in currencies}
+
+        self.timezones = {timezone.pk: timezone for timezone in timezones}
+        self.timezones_by_name = {timezone.zoneName: timezone for timezone in timezones}
+
+    @classmethod
+    def load(cls):
+        from world.models import Country, Currency, Timezone
+
+        countries = list(Country.objects.select_related("currency").prefetch_related("timezones"))
+        return cls(countries, list(Currency.objects.all()), list(Timezone.objects.all()))
+
+
+def normalize_phone_code(phone_code):
+    return (phone_code or "").strip().lstrip("+")
+
+
+class WorldRegistry:
+    """
+    Process-local registry of the world reference data.
+
+    Everything is loaded once and then served from memory. When
+    WORLD_REGISTRY_CACHE names a cache alias (the default cache by default),
+    the loaded data is shared through that cache and other processes notice
+    invalidations within WORLD_REGISTRY_CHECK_INTERVAL seconds. With None,
+    invalidations only reach the process that made the change.
+    """
+
+    def __init__(self):
+        self._data = None
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        alias = settings.WORLD_REGISTRY_CACHE
+        return caches[alias] if alias else None
+
+    def _is_stale(self):
+        cache = self.cache
+        if cache is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at < settings.WORLD_REGISTRY_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        return cache.get(WORLD_REGISTRY_VERSION_KEY) != self._version
+
+    def _load(self):
+        cache = self.cache
+        if cache is None:
+            return WorldData.load(), None
+
+        version = cache.get(WORLD_REGISTRY_VERSION_KEY)
+        if version is None:
+            cache.add(WORLD_REGISTRY_VERSION_KEY, uuid4().hex, None)
+            version = cache.get(WORLD_REGISTRY_VERSION_KEY)
+        # Data is stored under its version: data loaded while an invalidation
+        # happens lands under the old version and is never read again
+        key = f"{WORLD_REGISTRY_CACHE_KEY}:{version}"
+        data = cache.get(key)
+        if data is None:
+            data = WorldData.load()
+            cache.set(key, data, None)
+        return data, version
+
+    @property
+    def data(self):
+        if self._data is None or self._is_stale():
+            with self._lock:
+                self._data, self._version = self._load()
+                self._checked_at = time.monotonic()
+        return self._data
+
+    def invalidate(self):
+        """
+        Drop the loaded data here and, when shared, in every other process.
+        Call it once the change is committed, see world.signals.
+        """
+        with self._lock:
+            self._data = None
+            self._version = None
+            cache = self.cache
+            if cache is not None:
+                cache.set(WORLD_REGISTRY_VERSION_KEY, uuid4().hex, None)
+
+    # Countries
+    def all_countries(self):
+        return list(self.data.countries.values())
+
+    def get_country(self, pk):
+        return self.data.countries.get(pk)
+
+    def get_country_by_iso2(self, iso2):
+        return self.data.countries_by_iso2.get((iso2 or "").upper())
+
+    def get_country_by_iso3(self, iso3):
+        return self.data.countries_by_iso3.get((iso3 or "").upper())
+
+    def get_country_by_numeric_code(self, numeric_code):
+        return self.data.countries_by_numeric_code.get(numeric_code)
+
+    def get_countries_by_phone_code(self, phone_code):
+        """Several countries can share a phone code, e.g. +1"""
+        return list(self.data.countries_by_phone_code.get(normalize_phone_code(phone_code), []))
+
+    def get_country_timezones(self, country):
+        # Timezones are prefetched when the registry is loaded
+        return list(country.timezones.all())
+
+    # Currencies
+    def get_currency(self, pk):
+        return self.data.currencies.get(pk)
+
+    def get_currency_by_code(self, currency_code):
+        return self.data.currencies_by_code.get((currency_code or "").upper())
+
+    # Timezones
+    def get_timezone(self, pk):
+        return self.data.timezones.get(pk)
+
+    def get_timezone_by_name(self, zone_name):
+        return self.data.timezones_by_name.get(zone_name)
+
+
+world_registry = WorldRegistry()
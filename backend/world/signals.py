@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from world.models import Country, Currency, Timezone
+from world.registry import world_registry
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save, sender=Timezone)
+@receiver(post_delete, sender=Timezone)
+@receiver(m2m_changed, sender=Country.timezones.through)
+def world_data_changed(sender, **kwargs):
+    # After the commit: a rollback keeps the data, and readers can't cache the old rows again
+    transaction.on_commit(world_registry.invalidate)
@@ -1,3 +1,38 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from core import settings
+from world.models import Currency
+from world.registry import WorldRegistry, world_registry
+
+
+class WorldRegistryTests(TestCase):
+    def setUp(self):
+        # Check the shared version on every read
+        patcher = mock.patch.object(settings, 'WORLD_REGISTRY_CHECK_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        world_registry.invalidate()
+        Currency.objects.create(currency_code='TRY', currency_name='Turkish lira', currency_symbol='₺')
+
+    def test_changes_are_seen_after_commit(self):
+        self.assertIsNotNone(world_registry.get_currency_by_code('try'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Currency.objects.create(currency_code='EUR', currency_name='Euro', currency_symbol='€')
+            self.assertIsNone(world_registry.get_currency_by_code('EUR'))
+        self.assertIsNotNone(world_registry.get_currency_by_code('EUR'))
+
+    def test_rolled_back_changes_keep_the_registry(self):
+        data = world_registry.data
+        with self.captureOnCommitCallbacks(execute=False):
+            Currency.objects.create(currency_code='EUR', currency_name='Euro', currency_symbol='€')
+        self.assertIs(world_registry.data, data)
+
+    def test_invalidation_reaches_other_processes(self):
+        # A second registry stands for another worker sharing the cache
+        other = WorldRegistry()
+        self.assertIsNotNone(other.get_currency_by_code('TRY'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Currency.objects.create(currency_code='EUR', currency_name='Euro', currency_symbol='€')
+        self.assertIsNotNone(other.get_currency_by_code('EUR'))